@@ -1,11 +1,33 @@
 # create fasapi app
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates the per-process resources before the first request and releases
+    them on shutdown. Creating the schema and the root user is a separate
+    one-shot step: ``python -m app.cli init-db``.
+    """
+    from app.models.database import dispose_engines, get_engine
+    from app.security import get_revocation_list
+    from app.utils.crypto import shutdown_password_hash_pool
+    from app.utils.logger import setup_logging
+
+    setup_logging()
+    get_engine()
+    await get_revocation_list().start()
+    yield
+    get_revocation_list().stop()
+    shutdown_password_hash_pool()
+    await dispose_engines()
+
+
 # create FastAPI app
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     # add CORS middleware
     app.add_middleware(
@@ -16,4 +38,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # profile selected requests when enabled (see ProfilingMiddleware)
+    from app.middleware.profiling import profiling_middleware
+
+    app.add_middleware(profiling_middleware)
+
     return app
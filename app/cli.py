@@ -0,0 +1,52 @@
+"""
+One-shot management commands, run before starting the server:
+
+    python -m app.cli init-db
+    python -m app.cli init-db --skip-root-user
+"""
+
+import argparse
+import asyncio
+import sys
+
+
+async def init_db(skip_root_user: bool) -> None:
+    from app.models.database import (
+        create_db_and_tables,
+        dispose_engines,
+        upgrade_db,
+    )
+    from app.utils.crypto import shutdown_password_hash_pool
+    from app.utils.starter import insert_root_user
+
+    try:
+        await create_db_and_tables()
+        await upgrade_db()
+        if not skip_root_user:
+            await insert_root_user()
+    finally:
+        shutdown_password_hash_pool()
+        await dispose_engines()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    init_db_parser = commands.add_parser(
+        "init-db",
+        help="create or upgrade the tables and create the root user if missing",
+    )
+    init_db_parser.add_argument(
+        "--skip-root-user",
+        action="store_true",
+        help="only create or upgrade the tables",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "init-db":
+        asyncio.run(init_db(args.skip_root_user))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
@@ -7,11 +8,67 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 30
     jwt_refresh_token_expire_days: int = 15
+    jwt_refresh_token_rotation: bool = False
+    jwt_keys_dir: str = ""
+    jwt_signing_kid: str = ""
+    jwt_keys_refresh_seconds: int = 60
+    jwt_revocation_db: str = ""
+    jwt_revocation_sync_seconds: int = 5
+    jwt_claims_cache_size: int = 0
+    jwt_claims_cache_ttl_seconds: int = 300
     database_url: str
+    database_replica_urls: list[str] = []
+    database_replica_sticky_seconds: float = 5
+    database_pool_size: int | None = None
+    database_max_overflow: int | None = None
+    database_pool_timeout: float = 30
+    database_pool_recycle: int | None = None
+    database_pool_pre_ping: bool | None = None
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
     crypto_secret: str
     log_level: str = "INFO"
+    log_format: str = "text"
+    log_file: str = "./logs/application.log"
+    log_queue_size: int = 10000
+    log_queue_policy: str = "drop"
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_rotate_when: str = ""
+    log_backup_count: int = 5
+    request_log_level: str = "DEBUG"
+    request_log_sample_rate: float = 1.0
+    request_log_body_max_bytes: int = 2048
+    request_log_redact_headers: list[str] = [
+        "authorization",
+        "cookie",
+        "set-cookie",
+        "x-api-key",
+    ]
+    request_log_redact_fields: list[str] = ["password", "token", "secret"]
+    metrics_enabled: bool = True
+    metrics_dir: str = ""
+    metrics_flush_seconds: float = 5
+    cache_backend: str = ""
+    cache_max_entries: int = 10000
+    cache_ttl_seconds: float = 60
+    cache_redis_url: str = ""
+    profiling_enabled: bool = False
+    profiling_token: str = ""
+    profiling_sample_rate: float = 0.0
+    profiling_dir: str = "./profiles"
+    profiling_max_files: int = 100
     root_user_email: str
     root_user_password: str = ""
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    server_workers: int = 0
+    server_graceful_timeout_seconds: int = 30
+    password_hash_executor: str = "thread"
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
 
     class Config:
         env_file = ".env"
@@ -19,14 +76,53 @@ class Settings(BaseSettings):
         extra = "allow"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Returns the settings, read from the environment and .env on first use.
+    """
+    return Settings()
 
 
 class JWTSettings(BaseModel):
-    authjwt_secret_key: str = settings.jwt_secret_key
-    authjwt_algorithm: str = settings.jwt_algorithm
-    access_token_expire_minutes: int = settings.jwt_access_token_expire_minutes
-    refresh_token_expire_days: int = settings.jwt_refresh_token_expire_days
+    authjwt_secret_key: str
+    authjwt_algorithm: str
+    authjwt_keys_dir: str
+    authjwt_signing_kid: str
+    authjwt_keys_refresh_seconds: int
+    access_token_expire_minutes: int
+    refresh_token_expire_days: int
+    refresh_token_rotation: bool
+    revocation_db: str
+    revocation_sync_seconds: int
+    claims_cache_size: int
+    claims_cache_ttl_seconds: int
 
 
-jwt_settings = JWTSettings()
+@lru_cache
+def get_jwt_settings() -> JWTSettings:
+    settings = get_settings()
+    return JWTSettings(
+        authjwt_secret_key=settings.jwt_secret_key,
+        authjwt_algorithm=settings.jwt_algorithm,
+        authjwt_keys_dir=settings.jwt_keys_dir,
+        authjwt_signing_kid=settings.jwt_signing_kid,
+        authjwt_keys_refresh_seconds=settings.jwt_keys_refresh_seconds,
+        access_token_expire_minutes=settings.jwt_access_token_expire_minutes,
+        refresh_token_expire_days=settings.jwt_refresh_token_expire_days,
+        refresh_token_rotation=settings.jwt_refresh_token_rotation,
+        revocation_db=settings.jwt_revocation_db,
+        revocation_sync_seconds=settings.jwt_revocation_sync_seconds,
+        claims_cache_size=settings.jwt_claims_cache_size,
+        claims_cache_ttl_seconds=settings.jwt_claims_cache_ttl_seconds,
+    )
+
+
+def __getattr__(name: str):
+    # ``from app.config import settings`` keeps working, but the environment
+    # is only read when a module first asks for it.
+    if name == "settings":
+        return get_settings()
+    if name == "jwt_settings":
+        return get_jwt_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,57 @@
+import time
+from app.config import get_settings
+from app.utils.metrics import http_request_duration, http_requests, registry
+
+
+def route_template(scope) -> str:
+    """
+    Returns the path template of the matched route (e.g. "/api/users/{user_id}")
+    so that metrics are not labelled by raw paths.
+    """
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Counts requests and records their latency per method, route template and
+    status code.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_and_capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_capture)
+        finally:
+            labels = (scope["method"], route_template(scope), str(status))
+            http_requests.inc(*labels)
+            http_request_duration.observe(time.perf_counter() - started, *labels)
+            registry.maybe_flush()
+
+
+def metrics_middleware(app):
+    """
+    Wraps the app in MetricsMiddleware unless METRICS_ENABLED is false. The
+    setting is read when the middleware stack is built, on the first request.
+    """
+    if not get_settings().metrics_enabled:
+        return app
+    return MetricsMiddleware(app)
@@ -0,0 +1,97 @@
+import asyncio
+import cProfile
+import hmac
+import random
+import uuid
+from datetime import datetime, UTC
+from typing import Optional
+from app.config import get_settings
+from app.utils.logger import get_correlation_id, log_info
+from app.utils.profiling import ProfileStore, get_profile_store
+
+
+class ProfilingMiddleware:
+    """
+    Captures a cProfile profile of a request when it carries the
+    ``X-Profile-Token`` header with the configured token, or for a random
+    ``sample_rate`` fraction of requests. The profile is saved under a new
+    server-generated ID, which is returned in ``X-Profile-ID``; the request's
+    correlation ID, method and path are kept in the profile's metadata.
+
+    cProfile traces the whole event loop thread, so at most one request is
+    profiled at a time and others running concurrently appear in its profile.
+
+    Arguments left out are read from the settings when the middleware stack
+    is built, on the first request.
+    """
+
+    def __init__(
+        self,
+        app,
+        token: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        store: Optional[ProfileStore] = None,
+    ):
+        settings = get_settings()
+        self.app = app
+        token = settings.profiling_token if token is None else token
+        self.token = token.encode()
+        self.sample_rate = (
+            settings.profiling_sample_rate if sample_rate is None else sample_rate
+        )
+        self.store = get_profile_store() if store is None else store
+        self._active = False
+
+    def _requested(self, scope) -> bool:
+        if not self.token:
+            return False
+        for name, value in scope["headers"]:
+            if name == b"x-profile-token":
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or self._active
+            or not (self._requested(scope) or random.random() < self.sample_rate)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now(UTC):%Y%m%dT%H%M%S}-{uuid.uuid4().hex}"
+        metadata = {
+            "correlation_id": get_correlation_id(),
+            "method": scope["method"],
+            "path": scope["path"],
+        }
+        header = (b"x-profile-id", profile_id.encode("latin-1"))
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        self._active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self._active = False
+            path = await asyncio.to_thread(
+                self.store.save, profiler, profile_id, metadata
+            )
+            if path:
+                log_info(f"Saved profile of {scope['method']} {scope['path']}: {path}")
+
+
+def profiling_middleware(app):
+    """
+    Wraps the app in ProfilingMiddleware when PROFILING_ENABLED is set, and
+    otherwise returns it unchanged so disabled profiling costs nothing.
+    """
+    if not get_settings().profiling_enabled:
+        return app
+    return ProfilingMiddleware(app)
@@ -0,0 +1,49 @@
+import uuid
+from app.security import current_user_id, set_current_user_id
+from app.utils.logger import set_correlation_id
+
+
+class RequestContextMiddleware:
+    """
+    Sets the per-request context: the correlation ID (taken from the
+    X-Correlation-ID header or generated) and the current user ID (decoded
+    from a Bearer token, if any). The correlation ID is added to the response
+    headers by wrapping ``send``.
+
+    Written as a pure ASGI middleware, so responses are streamed through
+    untouched and no extra task is started per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = None
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"x-correlation-id":
+                correlation_id = value.decode("latin-1")
+            elif name == b"authorization":
+                authorization = value.decode("latin-1")
+
+        correlation_id = correlation_id or str(uuid.uuid4())
+        set_correlation_id(correlation_id)
+
+        current_user_id.set(None)
+        if authorization:
+            parts = authorization.split(" ")
+            if len(parts) == 2 and parts[0].lower() == "bearer" and parts[1]:
+                await set_current_user_id(parts[1])
+
+        header = (b"x-correlation-id", correlation_id.encode("latin-1"))
+
+        async def send_with_correlation_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        await self.app(scope, receive, send_with_correlation_id)
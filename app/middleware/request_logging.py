@@ -0,0 +1,171 @@
+import re
+import json
+import random
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Tuple
+from app.config import get_settings
+from app.utils.logger import logger, setup_logging
+
+
+def _field_pattern(fields: Iterable[str]) -> str:
+    return '[^"=&]*(?:%s)[^"=&]*' % "|".join(re.escape(field) for field in fields)
+
+
+class Redactor:
+    """
+    Masks sensitive header values, and the values of sensitive fields in JSON
+    bodies and query strings: any key that contains one of ``fields``,
+    case-insensitively.
+
+    Bodies that parse as JSON are redacted by key at any depth; truncated or
+    non-JSON bodies fall back to a pattern over the raw text.
+    """
+
+    def __init__(self, headers: Iterable[str], fields: Iterable[str]):
+        self.header_names = {name.lower() for name in headers}
+        self.fields = [field.lower() for field in fields]
+        pattern = _field_pattern(self.fields)
+        self._json = re.compile(
+            r'("%s"\s*:\s*)("(?:[^"\\]|\\.)*"?|[^,}\]\s]+)' % pattern, re.IGNORECASE
+        )
+        self._query = re.compile(r"((?:^|&)%s=)[^&]*" % pattern, re.IGNORECASE)
+
+    def headers(self, headers: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        return [
+            (name, "***" if name.lower() in self.header_names else value)
+            for name, value in headers
+        ]
+
+    def body(self, body: str) -> str:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return self._json.sub(r'\1"***"', body)
+        return json.dumps(self._redact(data), ensure_ascii=False)
+
+    def _redact(self, data: Any) -> Any:
+        if isinstance(data, dict):
+            return {
+                key: "***" if self._sensitive(key) else self._redact(value)
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self._redact(value) for value in data]
+        return data
+
+    def _sensitive(self, key: str) -> bool:
+        key = key.lower()
+        return any(field in key for field in self.fields)
+
+    def query(self, query: str) -> str:
+        return self._query.sub(r"\1***", query)
+
+
+@lru_cache
+def get_redactor() -> Redactor:
+    """
+    Returns the redactor for the configured header and field names.
+    """
+    settings = get_settings()
+    return Redactor(
+        settings.request_log_redact_headers, settings.request_log_redact_fields
+    )
+
+
+class RequestLoggingMiddleware:
+    """
+    Logs one line per request with its method, path, status, duration,
+    headers and body, with sensitive values redacted.
+
+    Written as a pure ASGI middleware: when the log level is disabled or the
+    request is not sampled it calls the app directly, and otherwise it only
+    copies the first ``body_max_bytes`` of the body as the app reads it, so
+    the body is neither buffered nor parsed a second time.
+
+    Arguments left out are read from the settings when the middleware stack
+    is built, on the first request.
+    """
+
+    def __init__(
+        self,
+        app,
+        level: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        body_max_bytes: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.app = app
+        level = settings.request_log_level if level is None else level
+        self.level = logging.getLevelName(level.upper())
+        self.sample_rate = (
+            settings.request_log_sample_rate if sample_rate is None else sample_rate
+        )
+        self.body_max_bytes = (
+            settings.request_log_body_max_bytes
+            if body_max_bytes is None
+            else body_max_bytes
+        )
+        self.redactor = get_redactor()
+
+    def _should_log(self) -> bool:
+        if not logger.isEnabledFor(self.level):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_log():
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+        body_size = 0
+        status = None
+
+        async def receive_and_capture():
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                room = self.body_max_bytes - len(body)
+                if room > 0:
+                    body.extend(chunk[:room])
+            return message
+
+        async def send_and_capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_and_capture, send_and_capture)
+        finally:
+            self._log(scope, status, time.perf_counter() - started, body, body_size)
+
+    def _log(self, scope, status, duration, body, body_size):
+        headers = [
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, value in scope["headers"]
+        ]
+        text = self.redactor.body(body.decode("utf-8", "replace"))
+        if body_size > len(body):
+            text += f"... ({body_size} bytes)"
+        setup_logging().log(
+            self.level,
+            "Request: %s %s%s status=%s duration_ms=%.1f headers=%s body=%s",
+            scope["method"],
+            scope["path"],
+            (
+                "?" + self.redactor.query(scope["query_string"].decode("latin-1"))
+                if scope["query_string"]
+                else ""
+            ),
+            status,
+            duration * 1000,
+            self.redactor.headers(headers),
+            text,
+        )
@@ -1,5 +1,13 @@
 from datetime import datetime, timezone
-from sqlmodel import Field, SQLModel
+from sqlalchemy import Index, event
+from sqlmodel import Field, SQLModel, column
+
+
+def active_rows():
+    """
+    The soft-delete filter as BaseService renders it, for partial indexes.
+    """
+    return column("is_deleted").is_(False)
 
 
 class BaseModel(SQLModel):
@@ -16,3 +24,19 @@ class BaseModel(SQLModel):
     )
     updated_at: datetime | None = Field(default=None)
     is_deleted: bool = Field(default=False)
+
+
+@event.listens_for(BaseModel, "instrument_class", propagate=True)
+def _add_soft_delete_indexes(mapper, cls):
+    """
+    Adds the composite indexes behind BaseService's soft-delete queries to
+    every table model: lookups and keyset pages by id, and listings ordered by
+    creation time.
+    """
+    table = cls.__table__
+    Index(f"ix_{table.name}_is_deleted_id", table.c.is_deleted, table.c.id)
+    Index(
+        f"ix_{table.name}_is_deleted_created_at",
+        table.c.is_deleted,
+        table.c.created_at,
+    )
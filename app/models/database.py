@@ -1,25 +1,366 @@
 import os
-from typing import Annotated
-from sqlmodel import SQLModel, Session, create_engine
+import time
+from functools import lru_cache
+from itertools import cycle
+from typing import Annotated, Any, Dict, List, Optional
+from sqlalchemy import Select, UniqueConstraint, event, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends
-from app.config import settings
+from app.config import get_settings
+from app.utils.cache import Cache, get_cache_backend
 
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
 
-if "/data/" in settings.database_url and not os.path.exists("data"):
-    os.makedirs("data")
 
+def get_async_database_url(database_url: str) -> str:
+    """
+    Returns the async driver variant of a database URL.
 
-connect_args = {"check_same_thread": False}
-engine = create_engine(settings.database_url, connect_args=connect_args)
+    URLs that already name a driver (e.g. "sqlite+aiosqlite://") are
+    returned unchanged.
+    """
+    scheme, separator, rest = database_url.partition("://")
+    if not separator or "+" in scheme:
+        return database_url
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
 
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+# (pool_size, max_overflow, pool_pre_ping, pool_recycle) per backend. SQLite
+# files are local, so there is nothing to ping or recycle; network databases
+# drop idle connections, so those are checked and replaced.
+POOL_DEFAULTS = {
+    "sqlite": (5, 10, False, -1),
+    "default": (10, 20, True, 1800),
+}
 
 
-def get_session():
-    with Session(engine) as session:
+PARTIAL_INDEX_DIALECTS = ("sqlite", "postgresql")
+
+
+def _is_sqlite_memory(database_url: str) -> bool:
+    _, _, rest = database_url.partition("://")
+    return rest in ("", "/", "/:memory:") or "mode=memory" in rest
+
+
+def get_engine_options(database_url: str) -> Dict[str, Any]:
+    """
+    Returns the engine keyword arguments for a database URL: the pool
+    settings from ``Settings``, falling back to defaults for the backend.
+    In-memory SQLite uses a single static connection and takes no pool
+    settings.
+    """
+    backend = database_url.partition("://")[0].partition("+")[0]
+    if backend != "sqlite":
+        pool_size, max_overflow, pre_ping, recycle = POOL_DEFAULTS["default"]
+        options = {}
+    elif _is_sqlite_memory(database_url):
+        return {"connect_args": {"check_same_thread": False}}
+    else:
+        pool_size, max_overflow, pre_ping, recycle = POOL_DEFAULTS["sqlite"]
+        options = {"connect_args": {"check_same_thread": False}}
+
+    def setting(value, default):
+        return default if value is None else value
+
+    settings = get_settings()
+    options.update(
+        pool_size=setting(settings.database_pool_size, pool_size),
+        max_overflow=setting(settings.database_max_overflow, max_overflow),
+        pool_pre_ping=setting(settings.database_pool_pre_ping, pre_ping),
+        pool_recycle=setting(settings.database_pool_recycle, recycle),
+        pool_timeout=settings.database_pool_timeout,
+    )
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Tunes each new SQLite connection for concurrent use: WAL lets readers
+    run alongside a writer, busy_timeout makes writers wait for the lock
+    instead of failing with "database is locked", and synchronous=NORMAL is
+    durable in WAL mode while syncing far less often.
+    """
+    settings = get_settings()
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    # A negative cache_size is in KiB rather than pages.
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+    cursor.close()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Returns the connection pool usage of this worker.
+    """
+    pool = get_engine().pool
+    stats = {"pid": os.getpid(), "pool": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+
+def _create_engine(database_url: str) -> AsyncEngine:
+    if "/data/" in database_url and not os.path.exists("data"):
+        os.makedirs("data")
+    engine = create_async_engine(
+        get_async_database_url(database_url), **get_engine_options(database_url)
+    )
+    # The services insert and soft-delete with INSERT/UPDATE ... RETURNING.
+    if not (engine.dialect.insert_returning and engine.dialect.update_returning):
+        raise ValueError(
+            f"{engine.dialect.name} does not support INSERT/UPDATE ... RETURNING; "
+            "use SQLite 3.35+ or PostgreSQL."
+        )
+    # Deleted users keep their email, so re-registering it relies on the
+    # partial unique index on users, which is declared for these two only.
+    if engine.dialect.name not in PARTIAL_INDEX_DIALECTS:
+        raise ValueError(
+            f"{engine.dialect.name} has no partial unique index on users.email; "
+            "use SQLite 3.35+ or PostgreSQL."
+        )
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+engine: Optional[AsyncEngine] = None
+replica_engines: List[AsyncEngine] = []
+_replicas = cycle(replica_engines)
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Returns the primary engine, creating it and the replica engines on first
+    use, so that importing this module opens nothing.
+    """
+    global engine, replica_engines, _replicas
+    if engine is None:
+        settings = get_settings()
+        engine = _create_engine(settings.database_url)
+        replica_engines = [
+            _create_engine(url) for url in settings.database_replica_urls
+        ]
+        _replicas = cycle(replica_engines)
+    return engine
+
+
+def _forget_engines_after_fork() -> None:
+    # The child must not use the connections pooled by the parent, nor close
+    # them: drop the pools and let get_engine create new engines.
+    global engine, replica_engines, _replicas
+    inherited = [engine, *replica_engines] if engine is not None else []
+    engine, replica_engines, _replicas = None, [], cycle(())
+    for forgotten in inherited:
+        forgotten.sync_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_engines_after_fork)
+
+
+async def dispose_engines() -> None:
+    """
+    Closes the pooled connections; the engines are created again on next use.
+    """
+    global engine, replica_engines, _replicas
+    engines = [engine, *replica_engines] if engine is not None else []
+    engine, replica_engines, _replicas = None, [], cycle(())
+    for disposed in engines:
+        await disposed.dispose()
+
+
+class RoutingSession(Session):
+    """
+    Sends SELECTs marked with the ``replica`` execution option to the read
+    replicas and everything else to the primary. Each transaction picks one
+    replica, in turn, and keeps it until it ends. Once a session has written
+    in its current transaction, all of its reads go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if clause is not None and not self._flushing:
+            if not isinstance(clause, Select):
+                self.info["wrote"] = True
+            elif (
+                replica_engines
+                and clause.get_execution_options().get("replica")
+                and not self.info.get("wrote")
+            ):
+                replica = self.info.get("replica")
+                if replica is None:
+                    replica = self.info["replica"] = next(_replicas)
+                return replica.sync_engine
+        else:
+            self.info["wrote"] = True
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_wrote(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
+        session.info.pop("replica", None)
+
+
+_session_factory = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+)
+
+
+def async_session() -> AsyncSession:
+    return _session_factory(bind=get_engine())
+
+
+_recent_writers: Dict[int, float] = {}
+
+
+@lru_cache
+def get_recent_writes_cache() -> Optional[Cache]:
+    """
+    Returns the cache recording each user's last write when the cache backend
+    is shared by all workers, or None to record writes in this process only.
+    """
+    backend = get_cache_backend()
+    if backend is None or not backend.shared:
+        return None
+    sticky_seconds = get_settings().database_replica_sticky_seconds
+    return Cache(backend, sticky_seconds, "recent-writes")
+
+
+async def note_write(user_id: Optional[int]) -> None:
+    """
+    Records that a user committed a write; their reads go to the primary for
+    ``database_replica_sticky_seconds`` so they see their own changes, on
+    every worker when the cache backend is shared.
+    """
+    if not replica_engines or user_id is None:
+        return
+    cache = get_recent_writes_cache()
+    if cache is not None:
+        await cache.set(str(user_id), {"at": time.time()})
+        return
+    now = time.monotonic()
+    if len(_recent_writers) > 10000:
+        for expired in [key for key, until in _recent_writers.items() if until <= now]:
+            del _recent_writers[expired]
+    _recent_writers[user_id] = now + get_settings().database_replica_sticky_seconds
+
+
+async def use_replica(user_id: Optional[int]) -> bool:
+    """
+    Returns whether a read for the user may go to a replica.
+    """
+    if not replica_engines:
+        return False
+    cache = get_recent_writes_cache()
+    if cache is not None:
+        return user_id is None or await cache.get(str(user_id)) is None
+    until = _recent_writers.get(user_id)
+    if until is None:
+        return True
+    if until > time.monotonic():
+        return False
+    _recent_writers.pop(user_id, None)
+    return True
+
+
+async def create_db_and_tables():
+    async with get_engine().begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+def _undeclared_unique_constraints(connection, table) -> List[Dict[str, Any]]:
+    declared = {
+        tuple(column.name for column in constraint.columns)
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    }
+    return [
+        constraint
+        for constraint in inspect(connection).get_unique_constraints(table.name)
+        if tuple(constraint["column_names"]) not in declared
+    ]
+
+
+def _rebuild_sqlite_table(connection, table) -> None:
+    # SQLite cannot drop a constraint: move the old table aside, create the
+    # table from the model and copy the rows over. legacy_alter_table keeps
+    # the rename from rewriting the foreign keys that point at the table.
+    old_name = f"_{table.name}_old"
+    preparer = connection.dialect.identifier_preparer
+    columns = ", ".join(
+        preparer.quote(column["name"])
+        for column in inspect(connection).get_columns(table.name)
+    )
+    connection.exec_driver_sql("PRAGMA legacy_alter_table=ON")
+    try:
+        with connection.begin_nested():
+            for index in inspect(connection).get_indexes(table.name):
+                connection.exec_driver_sql(
+                    f"DROP INDEX {preparer.quote(index['name'])}"
+                )
+            connection.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"RENAME TO {preparer.quote(old_name)}"
+            )
+            table.create(connection)
+            connection.exec_driver_sql(
+                f"INSERT INTO {preparer.format_table(table)} ({columns}) "
+                f"SELECT {columns} FROM {preparer.quote(old_name)}"
+            )
+            connection.exec_driver_sql(f"DROP TABLE {preparer.quote(old_name)}")
+    finally:
+        connection.exec_driver_sql("PRAGMA legacy_alter_table=OFF")
+
+
+def upgrade_schema(connection) -> None:
+    """
+    Brings tables created by earlier versions in line with the models: drops
+    the unique constraints the models no longer declare, such as the old
+    UNIQUE(email) on users that kept a deleted user's address from being
+    registered again, and creates the missing indexes.
+    """
+    preparer = connection.dialect.identifier_preparer
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspect(connection).has_table(table.name):
+            continue
+        undeclared = _undeclared_unique_constraints(connection, table)
+        if undeclared and connection.dialect.name == "sqlite":
+            _rebuild_sqlite_table(connection, table)
+            continue
+        for constraint in undeclared:
+            connection.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"DROP CONSTRAINT {preparer.quote(constraint['name'])}"
+            )
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+async def upgrade_db() -> None:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(upgrade_schema)
+
+
+async def get_session():
+    async with async_session() as session:
         yield session
 
 
-SessionDep = Annotated[Session, Depends(get_session)]
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
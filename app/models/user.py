@@ -1,9 +1,21 @@
+from sqlalchemy import Index
 from sqlmodel import Field
-from app.models.base import BaseModel
+from app.models.base import BaseModel, active_rows
 
 
 class Users(BaseModel, table=True):
-    email: str = Field(nullable=False, unique=True)
+    # Emails only have to be unique among users that are not soft-deleted.
+    __table_args__ = (
+        Index(
+            "ix_users_email_active",
+            "email",
+            unique=True,
+            sqlite_where=active_rows(),
+            postgresql_where=active_rows(),
+        ),
+    )
+
+    email: str = Field(nullable=False)
     first_name: str = Field(nullable=False)
     last_name: str = Field(nullable=False)
     password: str = Field(nullable=False)
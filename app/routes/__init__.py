@@ -1,6 +1,10 @@
 from fastapi import FastAPI, Depends
+from app.routes.admin import router as admin_router
 from app.routes.auth import router as auth_router
+from app.routes.health import router as health_router
+from app.routes.metrics import router as metrics_router
 from app.routes.user import router as user_router
+from app.routes.well_known import router as well_known_router
 from app.security import verify_access_token
 
 
@@ -15,4 +19,8 @@ def _add_secure_router(app: FastAPI, router, prefix: str, tags: list):
 
 def initialize_routes(app: FastAPI):
     app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
+    app.include_router(health_router, prefix="/health", tags=["health"])
+    app.include_router(well_known_router, prefix="/.well-known", tags=["well-known"])
     _add_secure_router(app, user_router, prefix="/api/users", tags=["users"])
+    _add_secure_router(app, admin_router, prefix="/api/admin", tags=["admin"])
+    app.include_router(metrics_router, tags=["metrics"])
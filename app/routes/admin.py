@@ -0,0 +1,59 @@
+import os
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from app.config import get_settings
+from app.models.database import SessionDep, get_pool_stats
+from app.security import get_claims_cache_stats, verify_access_token
+from app.services.user import get_user_service
+from app.utils.cache import get_cache_stats
+from app.utils.crypto import get_password_hash_stats
+from app.utils.profiling import get_profile_store
+
+
+async def require_root_user(
+    user_id: Annotated[str, Depends(verify_access_token)], session: SessionDep
+):
+    user = await get_user_service(session).get(int(user_id))
+    if not user or user.email != get_settings().root_user_email:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+
+
+router = APIRouter(dependencies=[Depends(require_root_user)])
+
+
+@router.get("/profiles")
+async def get_profiles():
+    return get_profile_store().list()
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    path = get_profile_store().path_for(profile_id)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(
+        path, media_type="application/octet-stream", filename=f"{profile_id}.prof"
+    )
+
+
+@router.get("/pool")
+async def get_pool():
+    return get_pool_stats()
+
+
+@router.get("/cache")
+async def get_cache():
+    return get_cache_stats()
+
+
+@router.get("/password-hash")
+async def get_password_hash():
+    return get_password_hash_stats()
+
+
+@router.get("/claims-cache")
+async def get_claims_cache():
+    return get_claims_cache_stats()
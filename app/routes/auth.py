@@ -1,16 +1,27 @@
 from typing import Annotated
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from app.models.database import SessionDep
 from app.services.user import get_user_service
-from app.schemas.user import UserLogin
-from app.security import create_access_token, create_refresh_token, verify_refresh_token
+from app.schemas.user import UserLogin, UserLogout
+from app.config import get_jwt_settings
+from app.security import (
+    bearer,
+    create_access_token,
+    create_refresh_token,
+    is_subject_stale,
+    revoke_token,
+    rotate_refresh_token,
+    verify_refresh_claims,
+    verify_token,
+)
 
 router = APIRouter()
 
 
 @router.post("/login")
 async def login(user: UserLogin, session: SessionDep):
-    user = get_user_service(session).login(user.email, user.password)
+    user = await get_user_service(session).login(user.email, user.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -26,17 +37,55 @@ async def login(user: UserLogin, session: SessionDep):
 @router.post("/refresh")
 async def refresh(
     session: SessionDep,
-    user_id: Annotated[str, Depends(verify_refresh_token)],
+    claims: Annotated[dict, Depends(verify_refresh_claims)],
 ):
+    user_id = claims.get("sub")
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
         )
-    user = get_user_service(session).get(int(user_id))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+
+    # With rotation, the user row is only read when the user changed since the
+    # token family was issued; otherwise the signed claims are carried forward.
+    rotation = get_jwt_settings().refresh_token_rotation
+    user = None
+    if not rotation or is_subject_stale(claims):
+        user = await get_user_service(session).get(int(user_id))
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            )
+
+    if not rotation:
+        access_token = await create_access_token(user)
+        return {"access_token": access_token}
+
+    access_token, refresh_token = await rotate_refresh_token(claims, user)
+    return {"access_token": access_token, "refresh_token": refresh_token}
+
+
+@router.post("/logout")
+async def logout(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(bearer)],
+    body: UserLogout | None = None,
+):
+    payload = await verify_token(credentials)
+    revoked = [(payload, credentials.credentials)]
+
+    if body and body.refresh_token:
+        refresh_payload = await verify_token(
+            HTTPAuthorizationCredentials(
+                scheme="Bearer", credentials=body.refresh_token
+            )
         )
+        is_refresh = refresh_payload.get("type") == "refresh"
+        if not is_refresh or refresh_payload.get("sub") != payload.get("sub"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid token type. refresh token required",
+            )
+        revoked.append((refresh_payload, body.refresh_token))
 
-    access_token = await create_access_token(user)
-    return {"access_token": access_token}
+    for token_payload, token in revoked:
+        await revoke_token(token_payload, token)
+    return {"message": "Logged out successfully"}
@@ -0,0 +1,27 @@
+import os
+from fastapi import APIRouter, Response, status
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app.models.database import get_engine
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def live():
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@router.get("/ready")
+async def ready(response: Response):
+    """
+    Reports whether this worker has started and can reach the database. The
+    pid tells the workers apart behind the shared socket.
+    """
+    try:
+        async with get_engine().connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except (SQLAlchemyError, OSError):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable", "pid": os.getpid()}
+    return {"status": "ready", "pid": os.getpid()}
@@ -0,0 +1,18 @@
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.config import get_settings
+from app.utils.metrics import registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    if not get_settings().metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # Take this worker's snapshot on the event loop; reading the other
+    # workers' snapshot files happens in a thread.
+    snapshot = registry.snapshot()
+    content = await asyncio.to_thread(registry.render, snapshot)
+    return PlainTextResponse(content, media_type="text/plain; version=0.0.4")
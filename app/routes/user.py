@@ -1,41 +1,244 @@
-from fastapi import APIRouter, HTTPException
-from app.models.database import SessionDep
-from app.schemas.user import UserUpdate, UserCreate, UserResponse
+import csv
+import io
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from app.models.database import SessionDep, async_session
+from app.models.user import Users
+from app.schemas.user import (
+    UserBatchDelete,
+    UserBatchUpdate,
+    UserUpdate,
+    UserCreate,
+    UserResponse,
+    UserListResponse,
+    UserSparseListResponse,
+    UserSparseResponse,
+)
 from app.services.user import get_user_service
+from app.utils.exception import ServiceUnavailableError, ValidationError
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter()
 
 
-def get_user_or_404(service, user_id):
-    user = service.get(user_id)
+async def get_user_or_404(service, user_id):
+    user = await service.get(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
+def apply_user_update(model: Users, user: UserUpdate) -> None:
+    if user.first_name:
+        model.first_name = user.first_name
+    if user.last_name:
+        model.last_name = user.last_name
+    if user.email:
+        model.email = user.email
+
+
+def ndjson_line(item: dict) -> bytes:
+    return to_json(item) + b"\n"
+
+
+def parse_fields(fields: str | None) -> list[str] | None:
+    """
+    Parses a ``fields`` parameter such as "email,first_name" into the
+    UserResponse fields to select; ``id`` is always returned.
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in UserResponse.model_fields]
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def stream_with_service(produce, **kwargs) -> StreamingResponse:
+    """
+    Streams the chunks that ``produce`` yields for a UserService. The body
+    opens its own session rather than using SessionDep: FastAPI 0.106 to
+    0.117 close dependencies with yield when the endpoint returns, before the
+    body is sent.
+    """
+
+    async def body():
+        async with async_session() as session:
+            async for chunk in produce(get_user_service(session)):
+                yield chunk
+
+    return StreamingResponse(body(), **kwargs)
+
+
+def csv_lines(rows: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
 @router.get("/")
 async def get_users(
     session: SessionDep,
-    skip: int = 0,
+    cursor: str | None = None,
+    skip: int = Query(0, deprecated=True),
     limit: int = 100,
-) -> list[UserResponse]:
+    fields: str | None = Query(None, description="e.g. email,first_name"),
+) -> UserListResponse | UserSparseListResponse:
     service = get_user_service(session)
-    models = service.fetch(skip=skip, limit=limit)
-    return [UserResponse.from_model(model) for model in models]
+    selected = parse_fields(fields)
+    if skip and not cursor:
+        rows = await service.fetch(skip=skip, limit=limit, fields=selected)
+    else:
+        after_id = decode_cursor(cursor).get("id") if cursor else None
+        rows = await service.fetch_after(
+            after_id=after_id, limit=limit, fields=selected
+        )
+
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor({"id": rows[-1].id})
+    if selected:
+        # Sparse rows are returned as they are, as UserSparseResponse.
+        items = [row._asdict() for row in rows]
+        return FastJSONResponse({"items": items, "next_cursor": next_cursor})
+    page = UserListResponse(
+        items=UserResponse.from_models(rows), next_cursor=next_cursor
+    )
+    return FastJSONResponse(page)
+
+
+@router.get("/export")
+async def export_users(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+) -> StreamingResponse:
+    """
+    Streams every active user as NDJSON or CSV. Rows are read from a
+    server-side cursor one batch at a time, and the next batch is only read
+    once the client has received the previous one, so memory use does not
+    grow with the number of users.
+    """
+    fields = list(UserResponse.model_fields)
+
+    async def ndjson(service):
+        async for batch in service.stream():
+            yield b"".join(
+                ndjson_line(UserResponse.from_model(model)) for model in batch
+            )
+
+    async def csv_rows(service):
+        yield csv_lines([fields])
+        async for batch in service.stream():
+            yield csv_lines(
+                [[getattr(model, field) for field in fields] for model in batch]
+            )
+
+    if export_format == "csv":
+        produce, media_type = csv_rows, "text/csv"
+    else:
+        produce, media_type = ndjson, "application/x-ndjson"
+    return stream_with_service(
+        produce,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{export_format}"'
+        },
+    )
+
+
+@router.post("/batch")
+async def create_users_batch(users: list[UserCreate]) -> StreamingResponse:
+    async def results(service):
+        for offset in range(0, len(users), service.bulk_chunk_size):
+            chunk = users[offset : offset + service.bulk_chunk_size]
+            try:
+                created = await service.bulk_create([user.to_model() for user in chunk])
+            except ServiceUnavailableError as exc:
+                created = [exc] * len(chunk)
+            for index, result in enumerate(created, start=offset):
+                if isinstance(result, Users):
+                    user = UserResponse.from_model(result)
+                    yield ndjson_line(
+                        {"index": index, "status": "created", "user": user}
+                    )
+                else:
+                    yield ndjson_line(
+                        {"index": index, "status": "error", "message": result.message}
+                    )
+
+    return stream_with_service(results, media_type="application/x-ndjson")
+
+
+@router.patch("/batch")
+async def modify_users_batch(users: list[UserBatchUpdate]) -> StreamingResponse:
+    async def results(service):
+        for offset in range(0, len(users), service.bulk_chunk_size):
+            chunk = users[offset : offset + service.bulk_chunk_size]
+            ids = [user.id for user in chunk]
+            found = {
+                model.id: model
+                for model in await service.fetch(Users.id.in_(ids), limit=len(ids))
+            }
+            for user in chunk:
+                if user.id in found:
+                    apply_user_update(found[user.id], user)
+
+            error = None
+            try:
+                await service.bulk_update(list(found.values()))
+            except ValidationError as exc:
+                error = exc.message
+            for index, user in enumerate(chunk, start=offset):
+                if user.id not in found:
+                    item = {"status": "error", "message": "User not found"}
+                elif error:
+                    item = {"status": "error", "message": error}
+                else:
+                    model = UserResponse.from_model(found[user.id])
+                    item = {"status": "updated", "user": model}
+                yield ndjson_line({"index": index, "id": user.id, **item})
+
+    return stream_with_service(results, media_type="application/x-ndjson")
+
+
+@router.delete("/batch")
+async def delete_users_batch(users: UserBatchDelete) -> StreamingResponse:
+    async def results(service):
+        for offset in range(0, len(users.ids), service.bulk_chunk_size):
+            chunk = users.ids[offset : offset + service.bulk_chunk_size]
+            deleted = set(await service.bulk_soft_delete(chunk))
+            for index, user_id in enumerate(chunk, start=offset):
+                status = "deleted" if user_id in deleted else "not_found"
+                yield ndjson_line({"index": index, "id": user_id, "status": status})
+
+    return stream_with_service(results, media_type="application/x-ndjson")
 
 
 @router.get("/{user_id}")
-async def get_user(user_id: int, session: SessionDep) -> UserResponse:
+async def get_user(
+    user_id: int,
+    session: SessionDep,
+    fields: str | None = Query(None, description="e.g. email,first_name"),
+) -> UserResponse | UserSparseResponse:
     service = get_user_service(session)
-    user = get_user_or_404(service, user_id)
-    return UserResponse.from_model(user)
+    selected = parse_fields(fields)
+    if selected:
+        row = await service.get(user_id, fields=selected)
+        if not row:
+            raise HTTPException(status_code=404, detail="User not found")
+        return FastJSONResponse(row._asdict())
+    user = await get_user_or_404(service, user_id)
+    return FastJSONResponse(UserResponse.from_model(user))
 
 
 @router.post("/")
 async def create_user(user: UserCreate, session: SessionDep) -> UserResponse:
     service = get_user_service(session)
-    model = service.create(user.to_model())
-    return UserResponse.from_model(model)
+    model = await service.create(user.to_model())
+    return FastJSONResponse(UserResponse.from_model(model))
 
 
 @router.put("/{user_id}")
@@ -43,12 +246,12 @@ async def update_user(
     user_id: int, user: UserCreate, session: SessionDep
 ) -> UserResponse:
     service = get_user_service(session)
-    model = get_user_or_404(service, user_id)
+    model = await get_user_or_404(service, user_id)
     model.first_name = user.first_name
     model.last_name = user.last_name
     model.email = user.email
-    service.update(model)
-    return UserResponse.from_model(model)
+    await service.update(model)
+    return FastJSONResponse(UserResponse.from_model(model))
 
 
 @router.patch("/{user_id}")
@@ -56,20 +259,15 @@ async def modify_user(
     user_id: int, user: UserUpdate, session: SessionDep
 ) -> UserResponse:
     service = get_user_service(session)
-    model = get_user_or_404(service, user_id)
-    if user.first_name:
-        model.first_name = user.first_name
-    if user.last_name:
-        model.last_name = user.last_name
-    if user.email:
-        model.email = user.email
-    service.update(model)
-    return UserResponse.from_model(model)
+    model = await get_user_or_404(service, user_id)
+    apply_user_update(model, user)
+    await service.update(model)
+    return FastJSONResponse(UserResponse.from_model(model))
 
 
 @router.delete("/{user_id}")
 async def delete_user(user_id: int, session: SessionDep):
     service = get_user_service(session)
-    user = get_user_or_404(service, user_id)
-    service.delete(user)
+    user = await get_user_or_404(service, user_id)
+    await service.delete(user)
     return {"message": "User deleted successfully"}
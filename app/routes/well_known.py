@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+from app.security import get_key_ring
+
+router = APIRouter()
+
+
+@router.get("/jwks.json")
+async def jwks(response: Response):
+    key_ring = get_key_ring()
+    response.headers["Cache-Control"] = f"public, max-age={key_ring.refresh_seconds}"
+    return key_ring.jwks()
@@ -1,8 +1,11 @@
-from typing import Type, Generic, TypeVar
-from pydantic import BaseModel as PydanticBaseModel
+from functools import lru_cache
+from typing import Type, Generic, TypeVar, List, Optional, Sequence
+from pydantic import BaseModel as PydanticBaseModel, ConfigDict, TypeAdapter
 from app.models.base import BaseModel
 
 T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R", bound=PydanticBaseModel)
+
 
 class BaseRequestSchema(PydanticBaseModel, Generic[T]):
     __abstract__ = True
@@ -17,9 +20,27 @@ class BaseRequestSchema(PydanticBaseModel, Generic[T]):
     def to_model(self) -> T:
         return self.model_class()(**self.dict())
 
+
 class BaseResponseSchema(PydanticBaseModel, Generic[T]):
     __abstract__ = True
+    model_config = ConfigDict(from_attributes=True)
 
     @classmethod
     def from_model(cls, model: T) -> "BaseResponseSchema":
-        return cls(**model.dict())
+        # Reads only the schema's fields from the ORM attributes, instead of
+        # copying the whole row (password hash included) to a dict first.
+        return cls.model_validate(model)
+
+    @classmethod
+    def from_models(cls, models: Sequence[T]) -> List["BaseResponseSchema"]:
+        return _list_adapter(cls).validate_python(models)
+
+
+@lru_cache
+def _list_adapter(schema: Type[R]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+class PageResponseSchema(PydanticBaseModel, Generic[R]):
+    items: List[R]
+    next_cursor: Optional[str] = None
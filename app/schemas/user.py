@@ -1,7 +1,7 @@
 from typing import Type
 from pydantic import BaseModel
 from app.models.user import Users
-from app.schemas.base import BaseRequestSchema, BaseResponseSchema
+from app.schemas.base import BaseRequestSchema, BaseResponseSchema, PageResponseSchema
 
 
 class UserLogin(BaseModel):
@@ -9,6 +9,10 @@ class UserLogin(BaseModel):
     password: str
 
 
+class UserLogout(BaseModel):
+    refresh_token: str | None = None
+
+
 class UserUpdate(BaseRequestSchema[Users]):
     first_name: str = None
     last_name: str = None
@@ -21,6 +25,14 @@ class UserUpdate(BaseRequestSchema[Users]):
         return Users
 
 
+class UserBatchUpdate(UserUpdate):
+    id: int
+
+
+class UserBatchDelete(BaseModel):
+    ids: list[int]
+
+
 class UserCreate(BaseRequestSchema[Users]):
     first_name: str
     last_name: str
@@ -40,3 +52,25 @@ class UserResponse(BaseResponseSchema[Users]):
     email: str
     phone_number: str | None = None
     teams_user_id: str | None = None
+
+
+class UserListResponse(PageResponseSchema[UserResponse]):
+    pass
+
+
+class UserSparseResponse(BaseModel):
+    """
+    A user with only the columns named by the ``fields`` query parameter;
+    ``id`` is always present and the other fields only when requested.
+    """
+
+    id: int
+    first_name: str = None
+    last_name: str = None
+    email: str = None
+    phone_number: str | None = None
+    teams_user_id: str | None = None
+
+
+class UserSparseListResponse(PageResponseSchema[UserSparseResponse]):
+    pass
@@ -1,40 +1,190 @@
+import hashlib
+import time
+from uuid import uuid4
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime, timedelta, UTC
 from contextvars import ContextVar
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import jwt
 
-from app.config import jwt_settings
+from app.config import get_jwt_settings
 from app.models.user import Users
+from app.utils.keys import KeyRing
+from app.utils.logger import log_warning
+from app.utils.metrics import time_stage
+from app.utils.revocation import (
+    MemoryRevocationStore,
+    RevocationList,
+    SqliteRevocationStore,
+)
 
 bearer = HTTPBearer()
 
+
+@lru_cache
+def get_key_ring() -> KeyRing:
+    """
+    Returns the key ring, loading the keys on first use.
+    """
+    jwt_settings = get_jwt_settings()
+    return KeyRing(
+        jwt_settings.authjwt_algorithm,
+        jwt_settings.authjwt_secret_key,
+        keys_dir=jwt_settings.authjwt_keys_dir,
+        signing_kid=jwt_settings.authjwt_signing_kid,
+        refresh_seconds=jwt_settings.authjwt_keys_refresh_seconds,
+    )
+
+
+@lru_cache
+def get_revocation_list() -> RevocationList:
+    """
+    Returns the revocation list, opening its store on first use.
+    """
+    jwt_settings = get_jwt_settings()
+    if jwt_settings.refresh_token_rotation and not jwt_settings.revocation_db:
+        log_warning(
+            "Refresh token rotation without JWT_REVOCATION_DB: every refresh "
+            "reloads the user, and revocations are lost on restart."
+        )
+    return RevocationList(
+        (
+            SqliteRevocationStore(jwt_settings.revocation_db)
+            if jwt_settings.revocation_db
+            else MemoryRevocationStore()
+        ),
+        sync_seconds=jwt_settings.revocation_sync_seconds,
+    )
+
+
 current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
 
+# The last token verified in the current request context with its claims, so the
+# middleware and the route dependencies decode each bearer token only once.
+verified_claims: ContextVar[Optional[Tuple[str, Dict[str, Any]]]] = ContextVar(
+    "verified_claims", default=None
+)
+
+
+class ClaimsCache:
+    """
+    Size-bounded LRU cache of verified JWT claims keyed by a SHA-256 digest of
+    the token.
+
+    Entries expire at the token's "exp" claim or after ``ttl_seconds``,
+    whichever comes first.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[bytes, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def set(self, token: str, payload: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        if "exp" in payload:
+            expires_at = min(expires_at, float(payload["exp"]))
+
+        key = self._digest(token)
+        self._entries[key] = (expires_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        self._entries.pop(self._digest(token), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+@lru_cache
+def get_claims_cache() -> Optional[ClaimsCache]:
+    """
+    Returns the claims cache, or None when JWT_CLAIMS_CACHE_SIZE is 0.
+    """
+    jwt_settings = get_jwt_settings()
+    if jwt_settings.claims_cache_size <= 0:
+        return None
+    return ClaimsCache(
+        jwt_settings.claims_cache_size, jwt_settings.claims_cache_ttl_seconds
+    )
+
 
 async def _get_jwt_payload(token: str) -> Dict[str, Any]:
     """
     Decodes and returns the JWT payload.
 
+    The payload of a token already verified in the current request context is
+    reused instead of being decoded again. When the claims cache is enabled,
+    tokens verified by earlier requests are served from it as well.
+
     Raises:
         HTTPException: If the token is invalid or expired.
     """
-    try:
-        payload = jwt.decode(
-            token,
-            jwt_settings.authjwt_secret_key,
-            algorithms=[jwt_settings.authjwt_algorithm],
-        )
-    except jwt.PyJWTError as exc:
-        raise HTTPException(status_code=401, detail=str(exc)) from exc
+    verified = verified_claims.get()
+    if verified is not None and verified[0] == token:
+        return verified[1]
+
+    claims_cache = get_claims_cache()
+    payload = claims_cache.get(token) if claims_cache is not None else None
+    if payload is None:
+        try:
+            with time_stage("jwt_decode"):
+                key, algorithm = get_key_ring().verification_key(token)
+                payload = jwt.decode(token, key, algorithms=[algorithm])
+        except jwt.PyJWTError as exc:
+            raise HTTPException(status_code=401, detail=str(exc)) from exc
+        if claims_cache is not None:
+            claims_cache.set(token, payload)
+
+    verified_claims.set((token, payload))
     return payload
 
 
-async def _verify_token_type(
+async def _verify_token_claims(
     credentials: HTTPAuthorizationCredentials, expected_type: str
-) -> str:
+) -> Dict[str, Any]:
     """
     Verifies that the provided JWT has the expected token type.
 
@@ -43,21 +193,54 @@ async def _verify_token_type(
         expected_type: The token type expected ("access" or "refresh").
 
     Returns:
-        The subject ("sub") claim from the token.
+        The verified claims of the token.
 
     Raises:
-        HTTPException: If the token type does not match the expected type.
+        HTTPException: If the token was revoked or its type does not match the
+            expected type.
     """
-    payload = await _get_jwt_payload(credentials.credentials)
+    payload = await verify_token(credentials)
     token_type = payload.get("type")
     if token_type != expected_type:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid token type. {expected_type} token required",
         )
+    return payload
+
+
+async def _verify_token_type(
+    credentials: HTTPAuthorizationCredentials, expected_type: str
+) -> str:
+    """
+    Verifies that the provided JWT has the expected token type and returns
+    the subject ("sub") claim.
+    """
+    payload = await _verify_token_claims(credentials, expected_type)
     return payload.get("sub")
 
 
+async def verify_token(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer),
+) -> Dict[str, Any]:
+    """
+    Dependency that verifies a token of any type and returns its claims.
+
+    Presenting a revoked refresh token is treated as token reuse: its whole
+    token family is revoked so the token that replaced it stops working too.
+    """
+    payload = await _get_jwt_payload(credentials.credentials)
+    family = payload.get("fam")
+    if family is not None and get_revocation_list().is_revoked(f"fam:{family}"):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    if is_token_revoked(payload):
+        if family is not None:
+            log_warning(f"Refresh token reuse detected for user {payload.get('sub')}")
+            await revoke_token_family(family)
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return payload
+
+
 async def verify_access_token(
     credentials: HTTPAuthorizationCredentials = Depends(bearer),
 ) -> str:
@@ -76,6 +259,19 @@ async def verify_refresh_token(
     return await _verify_token_type(credentials, "refresh")
 
 
+async def verify_refresh_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer),
+) -> Dict[str, Any]:
+    """
+    Dependency that verifies a refresh token and returns its claims.
+    """
+    return await _verify_token_claims(credentials, "refresh")
+
+
+def _user_claims(user: Users) -> Dict[str, Any]:
+    return {"sub": str(user.id), "email": user.email}
+
+
 def _create_jwt_token(user: Users, token_type: str) -> str:
     """
     Creates a JWT for the given user and token type.
@@ -90,6 +286,16 @@ def _create_jwt_token(user: Users, token_type: str) -> str:
     Raises:
         ValueError: If an unsupported token type is provided.
     """
+    return _create_jwt_token_from_claims(_user_claims(user), token_type)
+
+
+def _create_jwt_token_from_claims(claims: Dict[str, Any], token_type: str) -> str:
+    """
+    Creates a JWT from the "sub" and "email" claims of a user or of a verified
+    token. Refresh tokens keep the "fam" claim when one is given and start a
+    new token family otherwise.
+    """
+    jwt_settings = get_jwt_settings()
     now = datetime.now(UTC)
     if token_type == "access":
         exp = now + timedelta(minutes=jwt_settings.access_token_expire_minutes)
@@ -99,18 +305,24 @@ def _create_jwt_token(user: Users, token_type: str) -> str:
         raise ValueError("Invalid token type provided. Expected 'access' or 'refresh'.")
 
     payload = {
-        "sub": str(user.id),
+        "sub": claims["sub"],
         "type": token_type,
+        "jti": uuid4().hex,
         "iat": now,
         "exp": exp,
-        "email": user.email,
+        "email": claims.get("email"),
     }
-
-    return jwt.encode(
-        payload,
-        jwt_settings.authjwt_secret_key,
-        algorithm=jwt_settings.authjwt_algorithm,
-    )
+    if token_type == "refresh":
+        payload["fam"] = claims.get("fam") or uuid4().hex
+
+    with time_stage("jwt_encode"):
+        kid, key, algorithm = get_key_ring().signing_key()
+        return jwt.encode(
+            payload,
+            key,
+            algorithm=algorithm,
+            headers={"kid": kid} if kid else None,
+        )
 
 
 async def create_access_token(user: Users) -> str:
@@ -127,6 +339,25 @@ async def create_refresh_token(user: Users) -> str:
     return _create_jwt_token(user, "refresh")
 
 
+async def rotate_refresh_token(
+    claims: Dict[str, Any], user: Optional[Users] = None
+) -> Tuple[str, str]:
+    """
+    Revokes a verified refresh token and issues a new access and refresh token
+    pair in the same token family.
+
+    The new tokens are built from the signed claims of the old refresh token,
+    or from ``user`` when the caller had to reload it.
+    """
+    await revoke_token(claims)
+    new_claims = dict(_user_claims(user) if user is not None else claims)
+    new_claims["fam"] = claims.get("fam")
+    return (
+        _create_jwt_token_from_claims(new_claims, "access"),
+        _create_jwt_token_from_claims(new_claims, "refresh"),
+    )
+
+
 async def _get_user_id_from_token(token: str) -> Optional[int]:
     """
     Extracts the user ID from the JWT.
@@ -158,3 +389,90 @@ def get_current_user_id() -> Optional[int]:
     Retrieves the current user ID from the ContextVar.
     """
     return current_user_id.get()
+
+
+def get_current_claims() -> Optional[Dict[str, Any]]:
+    """
+    Retrieves the verified claims of the current request's token, if any.
+    """
+    verified = verified_claims.get()
+    return verified[1] if verified is not None else None
+
+
+def is_token_revoked(payload: Dict[str, Any]) -> bool:
+    """
+    Checks the token's "jti" claim against the revocation list.
+    """
+    jti = payload.get("jti")
+    return jti is not None and get_revocation_list().is_revoked(f"jti:{jti}")
+
+
+async def revoke_token(payload: Dict[str, Any], token: Optional[str] = None) -> None:
+    """
+    Revokes a verified token until it expires.
+
+    Tokens issued without a "jti" claim cannot be revoked and are ignored.
+    """
+    jti = payload.get("jti")
+    if jti is None:
+        return
+    await get_revocation_list().revoke(f"jti:{jti}", float(payload["exp"]))
+    if token is not None:
+        invalidate_cached_claims(token)
+
+
+async def revoke_token_family(family: str) -> None:
+    """
+    Revokes every refresh token of a token family, including ones issued later.
+    """
+    expires_at = time.time() + get_jwt_settings().refresh_token_expire_days * 86400
+    await get_revocation_list().revoke(f"fam:{family}", expires_at)
+
+
+async def mark_subject_stale(user_id: int) -> None:
+    """
+    Marks the tokens issued to a user so far as stale, e.g. after the user was
+    changed or deleted, so the next refresh re-checks the user row.
+    """
+    await mark_subjects_stale([user_id])
+
+
+async def mark_subjects_stale(user_ids: Sequence[int]) -> None:
+    """
+    Like ``mark_subject_stale`` for several users, with one store write.
+    """
+    expires_at = time.time() + get_jwt_settings().refresh_token_expire_days * 86400
+    keys = [f"sub:{user_id}" for user_id in user_ids]
+    await get_revocation_list().revoke_many(keys, expires_at)
+
+
+def is_subject_stale(claims: Dict[str, Any]) -> bool:
+    """
+    Checks whether the token was issued before its user was marked stale.
+
+    Without a durable revocation store (JWT_REVOCATION_DB) the marks are lost
+    on restart and not seen by other workers, so a missing mark proves
+    nothing and every token is treated as stale.
+    """
+    revocation_list = get_revocation_list()
+    if not revocation_list.store.durable:
+        return True
+    stale_at = revocation_list.revoked_at(f"sub:{claims.get('sub')}")
+    return stale_at is not None and float(claims.get("iat", 0)) <= stale_at
+
+
+def invalidate_cached_claims(token: str) -> None:
+    """
+    Drops the cached claims of a token, e.g. when it is revoked.
+    """
+    claims_cache = get_claims_cache()
+    if claims_cache is not None:
+        claims_cache.invalidate(token)
+
+
+def get_claims_cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    Returns the claims cache counters, or None when the cache is disabled.
+    """
+    claims_cache = get_claims_cache()
+    return claims_cache.stats() if claims_cache is not None else None
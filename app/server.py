@@ -0,0 +1,158 @@
+"""
+Production entry point: runs the app on several uvicorn worker processes.
+
+    python -m app.server
+    python -m app.server --workers 4 --host 0.0.0.0 --port 8000
+
+The number of workers defaults to the CPU quota of the container (cgroup
+v2 ``cpu.max`` or v1 ``cpu.cfs_quota_us``), or the usable CPUs without a
+quota. uvloop and httptools are used when installed. Send SIGHUP to the
+parent process for a rolling restart: each worker is replaced only after
+its replacement is ready. SIGTTIN and SIGTTOU add and remove a worker.
+
+With several workers, state that must be shared is moved out of the
+worker processes (see ``share_worker_state``).
+"""
+
+import argparse
+import glob
+import math
+import os
+import sys
+import tempfile
+from typing import List, Optional
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from app.config import Settings, get_settings
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+DEFAULT_REVOCATION_DB = "./data/revoked_tokens.db"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as cgroup_file:
+            return cgroup_file.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_quota() -> Optional[float]:
+    """
+    Returns the number of CPUs the cgroup may use, or None without a limit.
+    """
+    cpu_max = _read(CGROUP_V2_CPU_MAX)
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota, period = _read(CGROUP_V1_QUOTA), _read(CGROUP_V1_PERIOD)
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    """
+    One worker per CPU of the quota, rounded up, and at most one per usable
+    CPU.
+    """
+    cpus = available_cpus()
+    quota = cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+def share_worker_state(settings: Settings) -> List[str]:
+    """
+    Points the per-process state of several workers at shared locations,
+    through the environment the workers inherit:
+
+    - Revoked tokens go to a SQLite file (JWT_REVOCATION_DB), so a logout
+      handled by one worker is honoured by all of them.
+    - Each worker writes metrics snapshots to METRICS_DIR, so /metrics
+      reports all workers. Snapshots left by an earlier run are removed.
+    - Logs go to stderr only, unless LOG_FILE is set and contains "{pid}";
+      rotating one file from several processes is unsafe.
+    - Read replicas need the Redis cache, where each user's last write is
+      recorded for every worker to keep read-your-writes.
+
+    Returns:
+        The settings that cannot be shared this way, as error messages. The
+        environment is left unchanged when there are any.
+    """
+    errors = []
+    log_file_set = "log_file" in settings.model_fields_set
+    if log_file_set and settings.log_file and "{pid}" not in settings.log_file:
+        errors.append(
+            'LOG_FILE must contain "{pid}" with several workers, or be empty '
+            "to log to stderr only."
+        )
+    shared_cache = settings.cache_backend == "redis" and settings.cache_redis_url
+    if settings.database_replica_urls and not shared_cache:
+        errors.append(
+            "Read replicas with several workers need CACHE_BACKEND=redis and "
+            "CACHE_REDIS_URL, so that every worker sees each user's last write "
+            "(read-your-writes)."
+        )
+    if errors:
+        return errors
+
+    if not settings.jwt_revocation_db:
+        os.environ["JWT_REVOCATION_DB"] = DEFAULT_REVOCATION_DB
+    if not log_file_set:
+        os.environ["LOG_FILE"] = ""
+
+    metrics_dir = settings.metrics_dir or tempfile.mkdtemp(prefix="metrics-")
+    os.environ["METRICS_DIR"] = metrics_dir
+    for snapshot in glob.glob(os.path.join(metrics_dir, "worker-*.json")):
+        os.remove(snapshot)
+    return errors
+
+
+def main(argv=None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.server")
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.server_workers,
+        help="number of worker processes (default: CPU quota)",
+    )
+    args = parser.parse_args(argv)
+
+    workers = args.workers or default_workers()
+    if workers > 1:
+        for error in share_worker_state(settings):
+            parser.error(error)
+
+    config = uvicorn.Config(
+        "run:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop="auto",
+        http="auto",
+        timeout_graceful_shutdown=settings.server_graceful_timeout_seconds,
+    )
+    # Always supervise the workers, even a single one, so that SIGHUP
+    # restarts them without dropping the listening socket.
+    sock = config.bind_socket()
+    Multiprocess(config, sockets=[sock]).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,378 @@
-from typing import Type, Generic, TypeVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Type,
+    Generic,
+    TypeVar,
+)
 from datetime import datetime, UTC
-from sqlmodel import Session, select, func
+from sqlalchemy import DateTime, insert, select as select_rows, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.base import BaseModel
+from app.models.database import note_write, use_replica
 from app.security import get_current_user_id
+from app.utils.cache import Cache, get_cache
+from app.utils.metrics import time_stage
 
 T = TypeVar("T", bound=BaseModel)
+S = TypeVar("S")
 
 
 class BaseService(Generic[T]):
     __abstract__ = True
     model_class: Type[T]
+    bulk_chunk_size: int = 500
 
-    def __init__(self, session: Session, model_class: Type[T]):
+    def __init__(self, session: AsyncSession, model_class: Type[T]):
         self.session = session
         self.model_class = model_class
+        self.cache: Cache | None = get_cache(model_class.__tablename__)
 
-    def query(self):
-        return select(self.model_class).where(self.model_class.is_deleted.is_(False))
+    def _chunks(self, items: Sequence[S]) -> Iterator[Sequence[S]]:
+        size = self.bulk_chunk_size
+        for start in range(0, len(items), size):
+            yield items[start : start + size]
 
-    def where(self, *whereclause):
-        return self.query().where(*whereclause)
+    async def _checkout(self, statement) -> None:
+        # The first statement of a transaction waits for a pooled connection.
+        if not self.session.in_transaction():
+            with time_stage("db_pool_checkout"):
+                await self.session.connection(bind_arguments={"clause": statement})
 
-    def first(self, *whereclause):
+    async def _exec(self, statement, **kwargs):
+        """
+        Executes a statement, recording the wait for a pooled connection (the
+        first statement of a transaction) and the query time separately.
+        """
+        await self._checkout(statement)
+        with time_stage("db_query"):
+            return await self.session.exec(statement, **kwargs)
+
+    async def _for_read(self, statement):
+        # Reads go to a replica when replicas are configured and the current
+        # user has not written within the stickiness window.
+        if await use_replica(get_current_user_id()):
+            statement = statement.execution_options(replica=True)
+        return statement
+
+    async def _read(self, statement):
+        return await self._exec(await self._for_read(statement))
+
+    async def _commit(self) -> None:
+        await self.session.commit()
+        await note_write(get_current_user_id())
+        # Cache entries of rows changed with commit=False go stale now.
+        for cache, keys in self.session.info.pop("cache_invalidations", []):
+            await cache.invalidate(*keys)
+
+    def _columns(self, fields: Sequence[str]) -> list:
+        """
+        Returns the columns for the field names, with ``id`` always first.
+
+        Raises:
+            ValueError: If a name is not a column of the model.
+        """
+        table = self.model_class.__table__
+        unknown = [name for name in fields if name not in table.c]
+        if unknown:
+            raise ValueError(
+                f"Unknown {self.model_class.__name__} fields: {', '.join(unknown)}"
+            )
+        names = dict.fromkeys(["id", *fields])
+        return [table.c[name] for name in names]
+
+    def query(self, fields: Sequence[str] | None = None):
+        """
+        Selects the active rows as models or, with ``fields``, as lightweight
+        rows holding only those columns and ``id``, without ORM hydration.
+        """
+        active = self.model_class.is_deleted.is_(False)
+        if fields:
+            return select_rows(*self._columns(fields)).where(active)
+        return select(self.model_class).where(active)
+
+    def where(self, *whereclause, fields: Sequence[str] | None = None):
+        return self.query(fields).where(*whereclause)
+
+    async def first(self, *whereclause):
         query = self.where(*whereclause)
-        return self.session.exec(query).first()
+        return (await self._read(query)).first()
 
-    def fetch(self, *whereclause, skip: int = 0, limit: int = 10):
-        query = self.where(*whereclause).offset(skip).limit(limit)
-        return self.session.exec(query).all()
+    async def fetch(
+        self,
+        *whereclause,
+        skip: int = 0,
+        limit: int = 10,
+        fields: Sequence[str] | None = None,
+    ):
+        query = self.where(*whereclause, fields=fields).offset(skip).limit(limit)
+        return (await self._read(query)).all()
 
-    def count(self, *whereclause) -> int:
+    async def fetch_after(
+        self,
+        *whereclause,
+        after_id: int | None = None,
+        limit: int = 10,
+        fields: Sequence[str] | None = None,
+    ):
+        """
+        Keyset pagination: returns up to ``limit`` rows ordered by id, starting
+        after ``after_id``. Unlike ``fetch`` with ``skip``, every page costs the
+        same index range scan no matter how deep it is.
+        """
+        query = self.where(*whereclause, fields=fields)
+        if after_id is not None:
+            query = query.where(self.model_class.id > after_id)
+        query = query.order_by(self.model_class.id).limit(limit)
+        return (await self._read(query)).all()
+
+    async def stream(
+        self, *whereclause, batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[T]]:
+        """
+        Yields the active rows ordered by id, in batches of up to
+        ``batch_size``, from a server-side cursor. Only one batch is held in
+        memory, and the next one is fetched when the caller asks for it.
+        """
+        query = await self._for_read(
+            self.where(*whereclause)
+            .order_by(self.model_class.id)
+            .execution_options(yield_per=batch_size)
+        )
+        await self._checkout(query)
+        result = await self.session.stream_scalars(query)
+        try:
+            async for batch in result.partitions():
+                yield batch
+        finally:
+            await result.close()
+
+    async def count(self, *whereclause) -> int:
         query = select(func.count(self.model_class.id)).where(*whereclause)
-        return self.session.exec(query).one()
+        return (await self._read(query)).one()
 
-    def get(self, model_id: int) -> T | None:
-        query = self.query().where(self.model_class.id == model_id)
-        return self.session.exec(query).first()
+    async def explain(self, query) -> list[str]:
+        """
+        Returns the database's query plan for a query, e.g. to check that the
+        soft-delete queries use the indexes declared on BaseModel.
+        """
+        connection = await self.session.connection()
+        dialect = connection.dialect
+        compiled = query.compile(dialect=dialect)
+        prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+        if compiled.positional:
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+        else:
+            params = compiled.params
+        result = await connection.exec_driver_sql(prefix + str(compiled), params)
+        return [" ".join(str(value) for value in row) for row in result.all()]
 
-    def create(self, model: T, commit: bool = True) -> T:
-        model.created_user_id = get_current_user_id()
-        model.created_at = datetime.now(UTC)
-        model.updated_user_id = None
-        model.updated_at = None
+    def _row_values(self, model: T) -> Dict[str, Any]:
+        return {
+            column.key: getattr(model, column.key)
+            for column in self.model_class.__table__.columns
+        }
 
-        self.session.add(model)
+    def _from_cache(self, values: Dict[str, Any]) -> T:
+        values = dict(values)
+        for column in self.model_class.__table__.columns:
+            value = values.get(column.key)
+            column_type = getattr(column.type, "impl", column.type)
+            if isinstance(value, str) and isinstance(column_type, DateTime):
+                # JSON backends return datetimes as ISO strings.
+                values[column.key] = datetime.fromisoformat(value)
+        return self.model_class(**values)
+
+    async def _cache_model(self, model: T) -> None:
+        if self.cache is not None:
+            await self.cache.add(str(model.id), self._row_values(model))
+
+    async def _invalidate(self, *model_ids: int, commit: bool = True) -> None:
+        """
+        Invalidates the cached rows, or, with ``commit`` False, does so once
+        the session's pending changes are committed through ``_commit``.
+        """
+        if self.cache is None or not model_ids:
+            return
+        keys = [str(model_id) for model_id in model_ids]
         if commit:
-            self.session.commit()
-            self.session.refresh(model)
+            await self.cache.invalidate(*keys)
+        else:
+            pending = self.session.info.setdefault("cache_invalidations", [])
+            pending.append((self.cache, keys))
+
+    async def get(self, model_id: int, fields: Sequence[str] | None = None):
+        """
+        Returns the active row with the given id, from the cache when it is
+        enabled and holds the row. With ``fields``, returns a lightweight row
+        with only those columns, read from the database.
+        """
+        if fields:
+            query = self.where(self.model_class.id == model_id, fields=fields)
+            return (await self._read(query)).first()
+
+        if self.cache is not None:
+            values = await self.cache.get(str(model_id))
+            if values is not None:
+                model = self._from_cache(values)
+                # Attach the cached row as persisted without a SELECT; an
+                # instance already loaded in this session takes precedence.
+                make_transient_to_detached(model)
+                return await self.session.merge(model, load=False)
+
+        query = self.query().where(self.model_class.id == model_id)
+        model = (await self._read(query)).first()
+        if model is not None:
+            await self._cache_model(model)
         return model
 
-    def update(self, model: T, commit: bool = True) -> T:
+    def _insert_values(self, model: T) -> Dict[str, Any]:
+        values = {}
+        for column in self.model_class.__table__.columns:
+            value = getattr(model, column.key)
+            if not (column.primary_key and value is None):
+                values[column.key] = value
+        return values
+
+    async def _insert(self, models: Sequence[T], commit: bool) -> List[T]:
+        """
+        Inserts the models with one INSERT ... RETURNING statement that fills
+        in the server-generated columns, instead of a flush followed by a
+        refresh SELECT per row.
+        """
+        now = datetime.now(UTC)
+        user_id = get_current_user_id()
+        for model in models:
+            model.created_user_id = user_id
+            model.created_at = now
+            model.updated_user_id = None
+            model.updated_at = None
+
+        table = self.model_class.__table__
+        generated = [
+            column
+            for column in table.columns
+            if column.primary_key or column.server_default is not None
+        ]
+        rows_values = [self._insert_values(model) for model in models]
+        query = insert(table).returning(*generated, sort_by_parameter_order=True)
+        try:
+            rows = (await self._exec(query, params=rows_values)).all()
+            if commit:
+                await self._commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+
+        for model, values, row in zip(models, rows_values, rows):
+            values.update((column.key, value) for column, value in zip(generated, row))
+            for key, value in values.items():
+                setattr(model, key, value)
+            # Attach the row as already persisted, so no refresh is needed and
+            # later updates go through the session as usual.
+            make_transient_to_detached(model)
+            self.session.add(model)
+        return list(models)
+
+    async def create(self, model: T, commit: bool = True) -> T:
+        """
+        Inserts the model with a single INSERT ... RETURNING statement.
+
+        Raises:
+            IntegrityError: If the row violates a constraint. The transaction
+                is rolled back before the error is raised.
+        """
+        return (await self._insert([model], commit))[0]
+
+    async def bulk_create(self, models: Sequence[T]) -> List[T]:
+        """
+        Inserts the models in chunks of ``bulk_chunk_size`` rows, with one
+        INSERT ... RETURNING statement and one commit per chunk.
+
+        Raises:
+            IntegrityError: If a row violates a constraint. Chunks committed
+                before the failing one stay committed.
+        """
+        created = []
+        for chunk in self._chunks(models):
+            created.extend(await self._insert(chunk, commit=True))
+        return created
+
+    async def update(self, model: T, commit: bool = True) -> T:
         model.updated_user_id = get_current_user_id()
         model.updated_at = datetime.now(UTC)
         self.session.add(model)
         if commit:
-            self.session.commit()
-            self.session.refresh(model)
+            await self._commit()
+            await self.session.refresh(model)
+        await self._invalidate(model.id, commit=commit)
         return model
 
-    def delete(self, model: T, commit: bool = True) -> None:
+    async def bulk_update(self, models: Sequence[T]) -> List[T]:
+        """
+        Saves changes to already loaded models in chunks of
+        ``bulk_chunk_size``, letting the session batch the UPDATE statements
+        and committing once per chunk.
+        """
+        now = datetime.now(UTC)
+        user_id = get_current_user_id()
+        for chunk in self._chunks(models):
+            for model in chunk:
+                model.updated_user_id = user_id
+                model.updated_at = now
+            model_ids = [model.id for model in chunk]
+            self.session.add_all(chunk)
+            try:
+                await self._commit()
+            except IntegrityError:
+                await self.session.rollback()
+                raise
+            await self._invalidate(*model_ids)
+        return list(models)
+
+    async def bulk_soft_delete(self, model_ids: Sequence[int]) -> List[int]:
+        """
+        Soft-deletes the rows with the given ids in chunks of
+        ``bulk_chunk_size``, with one UPDATE ... RETURNING statement and one
+        commit per chunk.
+
+        Returns:
+            The ids that were found and deleted.
+        """
+        deleted = []
+        for chunk in self._chunks(model_ids):
+            query = (
+                update(self.model_class)
+                .where(
+                    self.model_class.id.in_(chunk),
+                    self.model_class.is_deleted.is_(False),
+                )
+                .values(
+                    is_deleted=True,
+                    updated_user_id=get_current_user_id(),
+                    updated_at=datetime.now(UTC),
+                )
+                .returning(self.model_class.id)
+            )
+            chunk_deleted = (await self._exec(query)).scalars().all()
+            await self._commit()
+            await self._invalidate(*chunk_deleted)
+            deleted.extend(chunk_deleted)
+        return deleted
+
+    async def delete(self, model: T, commit: bool = True) -> None:
         model.is_deleted = True
-        self.update(model, commit)
+        await self.update(model, commit)
 
-    def delete_by_id(self, model_id: int, commit: bool = True) -> None:
-        model = self.get(model_id)
+    async def delete_by_id(self, model_id: int, commit: bool = True) -> None:
+        model = await self.get(model_id)
         if not model:
             raise ValueError(f"{self.model_class.__name__} not found. ID: {model_id}")
-        self.delete(model, commit)
+        await self.delete(model, commit)
@@ -1,18 +1,36 @@
 import random
 import string
-from uuid import uuid4
-from sqlmodel import Session
+from typing import List, Sequence
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends
+from app.security import mark_subject_stale, mark_subjects_stale
 from app.services.base import BaseService
 from app.utils.logger import log_info
 from app.models.database import get_session
 from app.models.user import Users
-from app.utils.crypto import hash_password, verify_password
+from app.utils.crypto import (
+    hash_password_async,
+    hash_passwords_async,
+    verify_password_async,
+)
 from app.utils.exception import ValidationError
 
 
+def _is_duplicate_email(exc: IntegrityError) -> bool:
+    # PostgreSQL names the violated index; SQLite names its columns.
+    message = str(exc.orig)
+    return (
+        "ix_users_email_active" in message
+        or "UNIQUE constraint failed: users.email" in message
+    )
+
+
 class UserService(BaseService[Users]):
-    def __init__(self, session: Session):
+    bulk_create_attempts: int = 3
+
+    def __init__(self, session: AsyncSession):
         super().__init__(session, Users)
 
     def _geneate_password(self, length=4) -> str:
@@ -22,34 +40,159 @@ class UserService(BaseService[Users]):
         log_info(f"Generated password: {password}")
         return password
 
-    def _set_password_hash(self, model: Users) -> str:
+    def _clean_password(self, model: Users) -> str:
         clean_password = model.password
         if not clean_password:
             log_info(f"Generating password for {model.email}")
             clean_password = self._geneate_password()
-        model.password = hash_password(clean_password)
+        return clean_password
+
+    async def _set_password_hash(self, model: Users) -> None:
+        model.password = await hash_password_async(self._clean_password(model))
+
+    async def create(self, model: Users, commit=True):
+        # Duplicates are caught by the unique index on active emails, which
+        # also holds under concurrent signups.
+        await self._set_password_hash(model)
+        try:
+            model = await super().create(model, commit)
+        except IntegrityError as exc:
+            if not _is_duplicate_email(exc):
+                raise
+            raise ValidationError("User with this email already exists.") from exc
+        await self._invalidate_emails(model.email)
+        return model
+
+    async def _taken_emails(self, emails: Sequence[str]) -> set:
+        query = select(Users.email).where(
+            Users.is_deleted.is_(False), Users.email.in_(emails)
+        )
+        return set((await self._exec(query)).all())
+
+    async def bulk_create(
+        self, models: Sequence[Users]
+    ) -> List[Users | ValidationError]:
+        """
+        Creates users in chunks: one IN query per chunk finds existing emails,
+        the remaining passwords are hashed in parallel on the worker pool, and
+        the rows are inserted with one statement and one commit. When another
+        request takes one of the emails in between, the check and the insert
+        are retried, up to ``bulk_create_attempts`` times.
+
+        Returns:
+            For each input model, in order, the created user or the
+            ValidationError explaining why it was not created.
+        """
+        duplicate = ValidationError("User with this email already exists.")
+        results: List[Users | ValidationError] = []
+        for chunk in self._chunks(models):
+            chunk_results: List[Users | ValidationError] = list(chunk)
+            pending = dict(enumerate(chunk))
+            hashed = False
+            for _ in range(self.bulk_create_attempts):
+                taken = await self._taken_emails(
+                    [model.email for model in pending.values()]
+                )
+                for index, model in list(pending.items()):
+                    if model.email in taken:
+                        chunk_results[index] = duplicate
+                        del pending[index]
+                    else:
+                        taken.add(model.email)
+                if not pending:
+                    break
+
+                if not hashed:
+                    passwords = [
+                        self._clean_password(model) for model in pending.values()
+                    ]
+                    hashes = await hash_passwords_async(passwords)
+                    for model, password in zip(pending.values(), hashes):
+                        model.password = password
+                    hashed = True
+                try:
+                    await super().bulk_create(list(pending.values()))
+                except IntegrityError as exc:
+                    if not _is_duplicate_email(exc):
+                        raise
+                    continue
+                await self._invalidate_emails(
+                    *(model.email for model in pending.values())
+                )
+                pending = {}
+                break
+
+            for index in pending:
+                chunk_results[index] = ValidationError(
+                    "User not created due to concurrent changes. Please retry."
+                )
+            results.extend(chunk_results)
+        return results
+
+    async def update(self, model: Users, commit=True):
+        model = await super().update(model, commit)
+        await self._invalidate_emails(model.email)
+        await mark_subject_stale(model.id)
+        return model
+
+    async def bulk_update(self, models: Sequence[Users]) -> List[Users]:
+        """
+        Saves the users chunk by chunk, marking each committed chunk's users
+        stale with one revocation store write.
+        """
+        updated = []
+        for chunk in self._chunks(models):
+            model_ids = [model.id for model in chunk]
+            emails = [model.email for model in chunk]
+            try:
+                updated.extend(await super().bulk_update(chunk))
+            except IntegrityError as exc:
+                if not _is_duplicate_email(exc):
+                    raise
+                raise ValidationError("User with this email already exists.") from exc
+            await self._invalidate_emails(*emails)
+            await mark_subjects_stale(model_ids)
+        return updated
+
+    async def bulk_soft_delete(self, model_ids: Sequence[int]) -> List[int]:
+        deleted = []
+        for chunk in self._chunks(model_ids):
+            chunk_deleted = await super().bulk_soft_delete(chunk)
+            await mark_subjects_stale(chunk_deleted)
+            deleted.extend(chunk_deleted)
+        return deleted
 
-    def create(self, model: Users, commit=True):
-        existing_user = self.get_by_email(model.email)
-        if existing_user:
-            raise ValidationError("User with this email already exists.")
-        self._set_password_hash(model)
-        return super().create(model, commit)
+    async def _invalidate_emails(self, *emails: str) -> None:
+        if self.cache is not None and emails:
+            await self.cache.delete(*(f"email:{email}" for email in emails))
 
-    def delete(self, model, commit=True):
-        model.email = f"{model.email}-deleted-{uuid4()}"
-        return super().delete(model, commit)
+    async def get_by_email(self, email: str) -> Users:
+        """
+        Returns the active user with the email. With the cache enabled, the
+        email maps to an id whose row is read through ``get``; an entry left
+        behind by an email change or a delete, or stored by a reader racing
+        one, is detected and replaced.
+        """
+        if self.cache is not None:
+            cached = await self.cache.get(f"email:{email}")
+            if cached is not None:
+                user = await self.get(cached["id"])
+                if user is not None and user.email == email:
+                    return user
 
-    def get_by_email(self, email: str) -> Users:
-        return self.first(Users.email == email)
+        user = await self.first(Users.email == email)
+        if user is not None and self.cache is not None:
+            await self.cache.set(f"email:{email}", {"id": user.id})
+            await self._cache_model(user)
+        return user
 
-    def login(self, email: str, password: str) -> Users | None:
-        user = self.get_by_email(email)
+    async def login(self, email: str, password: str) -> Users | None:
+        user = await self.get_by_email(email)
         if not user:
             log_info(f"User not found with email: {email}")
             return None
         
-        if verify_password(password, user.password):
+        if await verify_password_async(password, user.password):
             log_info(f"Login successful for user: {email}")
             return user
         
@@ -57,5 +200,5 @@ class UserService(BaseService[Users]):
         return None
 
 
-def get_user_service(session: Session = Depends(get_session)) -> UserService:
+def get_user_service(session: AsyncSession = Depends(get_session)) -> UserService:
     return UserService(session)
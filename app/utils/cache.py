@@ -0,0 +1,263 @@
+import json
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from pydantic_core import to_json
+from app.config import get_settings
+from app.utils.metrics import registry
+
+cache_requests = registry.counter(
+    "cache_requests_total",
+    "Identity cache lookups by result.",
+    ("cache", "result"),
+)
+
+
+class CacheBackend:
+    """
+    Storage behind a ``Cache``. Values are dicts of plain column values, or
+    None for a tombstone, which reads as a miss but still blocks ``add``.
+    ``shared`` backends are seen by every worker.
+    """
+
+    shared = False
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Optional[Dict[str, Any]], ttl: float) -> None:
+        raise NotImplementedError
+
+    async def add(self, key: str, value: Dict[str, Any], ttl: float) -> bool:
+        """
+        Stores the value unless the key holds a value or a tombstone, and
+        returns whether it was stored.
+        """
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU with a per-entry TTL. Invalidation is only seen by this
+    worker, so use it with a single worker or a short TTL.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: Optional[Dict[str, Any]], ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def add(self, key: str, value: Dict[str, Any], ttl: float) -> bool:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the subset of the ``redis.asyncio`` client used by
+    ``RedisCacheBackend``: bytes values with an expiry in seconds.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+
+    async def get(self, name: str) -> Optional[bytes]:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[name]
+            return None
+        return value
+
+    async def set(
+        self, name: str, value: bytes, ex: Optional[float] = None, nx: bool = False
+    ) -> Optional[bool]:
+        if nx and await self.get(name) is not None:
+            return None
+        expires_at = time.monotonic() + ex if ex is not None else None
+        self._data[name] = (expires_at, value)
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum(self._data.pop(name, None) is not None for name in names)
+
+    async def dbsize(self) -> int:
+        return len(self._data)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Stores JSON-encoded values in a Redis-compatible async client, shared by
+    all workers, so invalidation is seen everywhere. Eviction is left to the
+    server's maxmemory policy.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.shared = not isinstance(client, LocalRedis)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        data = await self.client.get(key)
+        return None if data is None else json.loads(data)
+
+    async def set(self, key: str, value: Optional[Dict[str, Any]], ttl: float) -> None:
+        await self.client.set(key, to_json(value), ex=max(int(ttl), 1))
+
+    async def add(self, key: str, value: Dict[str, Any], ttl: float) -> bool:
+        stored = await self.client.set(
+            key, to_json(value), ex=max(int(ttl), 1), nx=True
+        )
+        return bool(stored)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+
+class Cache:
+    """
+    Read-through cache front end that namespaces keys and counts hits and
+    misses.
+
+    Rows read from the database are stored with ``add``, and writers call
+    ``invalidate``, which leaves a tombstone for ``tombstone_ttl`` seconds. A
+    reader that fetched a row before a concurrent write committed therefore
+    cannot put the stale row back in the cache once the writer invalidated it.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float = 60,
+        name: str = "default",
+        tombstone_ttl: float = 5,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.name = name
+        self.tombstone_ttl = tombstone_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self.backend.get(self._key(key))
+        if value is None:
+            self.misses += 1
+            cache_requests.inc(self.name, "miss")
+        else:
+            self.hits += 1
+            cache_requests.inc(self.name, "hit")
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await self.backend.set(self._key(key), value, self.ttl)
+
+    async def add(self, key: str, value: Dict[str, Any]) -> bool:
+        return await self.backend.add(self._key(key), value, self.ttl)
+
+    async def delete(self, *keys: str) -> None:
+        await self.backend.delete(*(self._key(key) for key in keys))
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            await self.backend.set(self._key(key), None, self.tombstone_ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+        }
+
+
+def create_cache_backend(backend: str) -> Optional[CacheBackend]:
+    """
+    Returns the backend named by the CACHE_BACKEND setting, or None when
+    caching is disabled.
+    """
+    if not backend:
+        return None
+    settings = get_settings()
+    if backend == "memory":
+        return MemoryCacheBackend(settings.cache_max_entries)
+    if backend == "redis":
+        if not settings.cache_redis_url:
+            return RedisCacheBackend(LocalRedis())
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:
+            raise ValueError(
+                "CACHE_REDIS_URL is set but the redis package is not installed."
+            ) from exc
+        return RedisCacheBackend(Redis.from_url(settings.cache_redis_url))
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+
+@lru_cache
+def get_cache_backend() -> Optional[CacheBackend]:
+    """
+    Returns the backend shared by all caches, created on first use.
+    """
+    return create_cache_backend(get_settings().cache_backend)
+
+
+_caches: Dict[str, Cache] = {}
+
+
+def get_cache(name: str) -> Optional[Cache]:
+    """
+    Returns the shared cache for a namespace (e.g. a table name), or None when
+    caching is disabled.
+    """
+    cache = _caches.get(name)
+    if cache is None:
+        backend = get_cache_backend()
+        if backend is None:
+            return None
+        ttl = get_settings().cache_ttl_seconds
+        cache = _caches[name] = Cache(backend, ttl, name)
+    return cache
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -1,30 +1,196 @@
+import os
+import asyncio
 from base64 import urlsafe_b64encode
-from werkzeug.security import generate_password_hash, check_password_hash
+from functools import lru_cache
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
 from cryptography.fernet import Fernet
-from app.config import settings
+from app.config import get_settings
+from app.utils.exception import ServiceUnavailableError
+from app.utils.metrics import time_stage
 
-if not settings.crypto_secret:
-    raise ValueError("CryptoSecret is not set in the environment variables.")
-s = bytes(settings.crypto_secret, "utf-8")
-key = urlsafe_b64encode(s)
 
-fernet = Fernet(key)
+@lru_cache
+def get_fernet() -> Fernet:
+    """
+    Returns the Fernet instance for CRYPTO_SECRET, built on first use.
+    """
+    settings = get_settings()
+    if not settings.crypto_secret:
+        raise ValueError("CryptoSecret is not set in the environment variables.")
+    s = bytes(settings.crypto_secret, "utf-8")
+    key = urlsafe_b64encode(s)
+    return Fernet(key)
 
 
 def encrypt(message: str):
-    enc_message = fernet.encrypt(message.encode()).decode("utf-8")
+    enc_message = get_fernet().encrypt(message.encode()).decode("utf-8")
     return enc_message
 
 
 def decrypt(enc_message: str):
-    dec_message = fernet.decrypt(enc_message).decode()
+    dec_message = get_fernet().decrypt(enc_message).decode()
     return dec_message
 
 
 def hash_password(password: str):
+    # werkzeug is imported on first use, which is usually on a pool worker.
+    from werkzeug.security import generate_password_hash
+
     hashed_password = generate_password_hash(password)
     return hashed_password
 
 
 def verify_password(password: str, hashed_password: str):
+    from werkzeug.security import check_password_hash
+
     return check_password_hash(hashed_password, password)
+
+
+class PasswordHashPool:
+    """
+    Runs password hashing and verification on a bounded worker pool.
+
+    At most ``max_pending`` jobs may be queued or running at once; further
+    submissions fail immediately with ``ServiceUnavailableError`` instead of
+    growing the queue.
+    """
+
+    def __init__(self, executor_type: str, max_workers: int, max_pending: int):
+        if executor_type not in ("thread", "process"):
+            raise ValueError("Invalid executor type. Expected 'thread' or 'process'.")
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor: Executor | None = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ServiceUnavailableError(
+                "Server is busy. Please retry the request shortly."
+            )
+
+        self.pending += 1
+        start = perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            elapsed = perf_counter() - start
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    async def map(self, func, *iterables) -> list:
+        """
+        Runs ``func`` over the arguments with at most ``max_workers`` jobs of
+        this call in flight, so batch work leaves the rest of the queue to
+        other requests.
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run_one(*args):
+            async with semaphore:
+                return await self.run(func, *args)
+
+        return await asyncio.gather(*(run_one(*args) for args in zip(*iterables)))
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_type,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "queue_depth": max(self.pending - self.max_workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_seconds": (
+                self.total_seconds / self.completed if self.completed else 0.0
+            ),
+            "max_seconds": self.max_seconds,
+        }
+
+    def reset_after_fork(self) -> None:
+        # The executor's threads or processes belong to the parent process.
+        self._executor = None
+        self.pending = 0
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+password_hash_pool: PasswordHashPool | None = None
+
+
+def get_password_hash_pool() -> PasswordHashPool:
+    """
+    Returns the password hash pool, created from the settings on first use.
+    """
+    global password_hash_pool
+    if password_hash_pool is None:
+        settings = get_settings()
+        password_hash_pool = PasswordHashPool(
+            settings.password_hash_executor,
+            settings.password_hash_workers,
+            settings.password_hash_max_pending,
+        )
+    return password_hash_pool
+
+
+def shutdown_password_hash_pool() -> None:
+    """
+    Stops the pool's workers; the pool is created again on next use.
+    """
+    global password_hash_pool
+    pool, password_hash_pool = password_hash_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _reset_pool_after_fork() -> None:
+    if password_hash_pool is not None:
+        password_hash_pool.reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+async def hash_password_async(password: str) -> str:
+    with time_stage("password_hash"):
+        return await get_password_hash_pool().run(hash_password, password)
+
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    with time_stage("password_hash"):
+        return await get_password_hash_pool().map(hash_password, passwords)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    with time_stage("password_verify"):
+        return await get_password_hash_pool().run(
+            verify_password, password, hashed_password
+        )
+
+
+def get_password_hash_stats() -> dict:
+    return get_password_hash_pool().stats()
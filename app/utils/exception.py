@@ -17,3 +17,9 @@ class CustomError(FastAPIError):
 
     def __str__(self):
         return self.message
+
+
+class ServiceUnavailableError(CustomError):
+    def __init__(self, *messages: str, retry_after: int = 1):
+        self.retry_after = retry_after
+        super().__init__(*messages)
@@ -0,0 +1,209 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_private_key,
+    load_pem_public_key,
+)
+from jwt.algorithms import get_default_algorithms
+
+from app.utils.logger import log_info, log_warning
+
+EC_CURVE_ALGORITHMS = {
+    "secp256r1": "ES256",
+    "secp384r1": "ES384",
+    "secp521r1": "ES512",
+    "secp256k1": "ES256K",
+}
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    kid: str
+    algorithm: str
+    public_key: Any
+    private_key: Any = None
+    modified_at: float = 0.0
+
+
+def _algorithm_for_key(public_key: Any, preferred: str) -> str:
+    """
+    Returns the JWS algorithm for a public key, preferring the configured one
+    when it belongs to the key's family.
+    """
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return preferred if preferred[:2] in ("RS", "PS") else "RS256"
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return EC_CURVE_ALGORITHMS[public_key.curve.name]
+    if isinstance(public_key, (ed25519.Ed25519PublicKey, ed448.Ed448PublicKey)):
+        return "EdDSA"
+    raise ValueError(f"Unsupported key type: {type(public_key).__name__}")
+
+
+def _load_key_file(path: str, preferred_algorithm: str) -> JWTKey:
+    """
+    Parses a PEM file holding either a private key (signing and verification)
+    or a public key (verification only). The key ID is the file name without
+    its extension.
+    """
+    with open(path, "rb") as key_file:
+        data = key_file.read()
+
+    kid = os.path.splitext(os.path.basename(path))[0]
+    private_key = None
+    if b"PRIVATE KEY" in data:
+        private_key = load_pem_private_key(data, password=None)
+        public_key = private_key.public_key()
+    else:
+        public_key = load_pem_public_key(data)
+
+    return JWTKey(
+        kid=kid,
+        algorithm=_algorithm_for_key(public_key, preferred_algorithm),
+        public_key=public_key,
+        private_key=private_key,
+        modified_at=os.path.getmtime(path),
+    )
+
+
+class KeyRing:
+    """
+    Holds the parsed keys used to sign and verify JWTs.
+
+    With an HMAC algorithm (the default) the shared secret is used and tokens
+    carry no "kid". Otherwise keys are loaded from ``*.pem`` files in
+    ``keys_dir`` and selected by "kid". The directory is re-scanned at most
+    every ``refresh_seconds`` so keys can be rotated without a restart; PEM
+    files are only parsed again when they change. A failed re-scan keeps the
+    keys loaded last; only the initial load raises.
+
+    The signing key is ``signing_kid`` when set, otherwise the most recently
+    modified private key.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret: str,
+        keys_dir: str = "",
+        signing_kid: str = "",
+        refresh_seconds: int = 60,
+    ):
+        self.algorithm = algorithm
+        self.secret = secret
+        self.keys_dir = keys_dir
+        self.signing_kid = signing_kid
+        self.refresh_seconds = refresh_seconds
+        self._keys: Dict[str, JWTKey] = {}
+        self._signing_key: Optional[JWTKey] = None
+        self._fingerprint: Tuple = ()
+        self._checked_at = 0.0
+
+        if self.is_asymmetric:
+            if not keys_dir:
+                raise ValueError(
+                    f"JWT_KEYS_DIR must be set to use the {algorithm} algorithm."
+                )
+            self.reload()
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return not self.algorithm.startswith("HS")
+
+    def _scan(self) -> Tuple:
+        entries = []
+        for name in sorted(os.listdir(self.keys_dir)):
+            if name.endswith(".pem"):
+                stat = os.stat(os.path.join(self.keys_dir, name))
+                entries.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def reload(self, force: bool = False) -> None:
+        """
+        Re-reads the key directory if any key file was added, removed or
+        modified since the last load.
+        """
+        fingerprint = self._scan()
+        self._checked_at = time.monotonic()
+        if fingerprint == self._fingerprint and not force:
+            return
+
+        previous = {(key.kid, key.modified_at): key for key in self._keys.values()}
+        keys: Dict[str, JWTKey] = {}
+        for name, _, _ in fingerprint:
+            path = os.path.join(self.keys_dir, name)
+            kid = os.path.splitext(name)[0]
+            cached = previous.get((kid, os.path.getmtime(path)))
+            try:
+                keys[kid] = cached or _load_key_file(path, self.algorithm)
+            except (OSError, ValueError, TypeError) as exc:
+                log_warning(f"Skipping invalid JWT key file {name}: {exc}")
+
+        signers = [key for key in keys.values() if key.private_key is not None]
+        if self.signing_kid:
+            signers = [key for key in signers if key.kid == self.signing_kid]
+        if not signers:
+            raise ValueError(f"No usable JWT signing key found in {self.keys_dir}.")
+
+        self._keys = keys
+        self._signing_key = max(signers, key=lambda key: (key.modified_at, key.kid))
+        self._fingerprint = fingerprint
+        log_info(
+            f"Loaded {len(keys)} JWT key(s), signing with kid {self._signing_key.kid}"
+        )
+
+    def _refresh(self) -> None:
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        try:
+            self.reload()
+        except (OSError, ValueError) as exc:
+            # Only the initial load must succeed: keep serving the keys loaded
+            # last, and try again after refresh_seconds.
+            self._checked_at = time.monotonic()
+            log_warning(f"Keeping the current JWT keys, reload failed: {exc}")
+
+    def signing_key(self) -> Tuple[Optional[str], Any, str]:
+        """
+        Returns the key ID, key object and algorithm used to sign new tokens.
+        """
+        if not self.is_asymmetric:
+            return None, self.secret, self.algorithm
+        self._refresh()
+        key = self._signing_key
+        return key.kid, key.private_key, key.algorithm
+
+    def verification_key(self, token: str) -> Tuple[Any, str]:
+        """
+        Returns the key object and algorithm that must have signed the token.
+
+        Raises:
+            jwt.PyJWTError: If the token names no known key.
+        """
+        if not self.is_asymmetric:
+            return self.secret, self.algorithm
+        kid = jwt.get_unverified_header(token).get("kid")
+        self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key: {kid}")
+        return key.public_key, key.algorithm
+
+    def jwks(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Returns the public verification keys as a JSON Web Key Set.
+        """
+        if not self.is_asymmetric:
+            return {"keys": []}
+        self._refresh()
+        algorithms = get_default_algorithms()
+        keys = []
+        for key in self._keys.values():
+            jwk = algorithms[key.algorithm].to_jwk(key.public_key, as_dict=True)
+            jwk.update({"kid": key.kid, "alg": key.algorithm, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
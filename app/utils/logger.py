@@ -1,7 +1,12 @@
 import os
+import copy
+import json
+import queue
+import atexit
 import logging
+import logging.handlers
 from contextvars import ContextVar
-from app.config import settings
+from app.config import get_settings
 
 correlation_id_var = ContextVar("correlation_id", default="unknown")
 
@@ -20,53 +25,282 @@ class CorrelationIDFilter(logging.Filter):
         return True
 
 
-def get_logger(name):
-    application_logger = logging.getLogger(name)
-    application_logger.setLevel(settings.log_level)
+class JSONFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+    """
+
+    def format(self, record):
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "correlation_id": getattr(record, "correlation_id", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue for the writer thread.
+
+    With the "drop" policy a full queue drops the record instead of blocking
+    the caller; the number of dropped records is reported with the next
+    record that fits. With the "block" policy the caller waits for room.
+    """
+
+    def __init__(self, log_queue: queue.Queue, policy: str = "drop"):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record):
+        # Only freeze what may change after the call returns: the message
+        # arguments and the traceback. Formatting happens on the writer thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self._dropped_record(record))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+    def _dropped_record(self, record):
+        return logging.makeLogRecord(
+            {
+                "name": record.name,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Dropped {self._unreported} log record(s), queue full",
+                "correlation_id": getattr(record, "correlation_id", None),
+            }
+        )
+
+
+class BatchFlushMixin:
+    """
+    Skips the flush after every record; ``BatchingQueueListener`` calls
+    ``flush_batch`` once the queue is drained or a batch is complete.
+    """
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchStreamHandler(BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class BatchRotatingFileHandler(BatchFlushMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class BatchTimedRotatingFileHandler(
+    BatchFlushMixin, logging.handlers.TimedRotatingFileHandler
+):
+    pass
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    Writes queued records on a background thread, flushing the handlers once
+    per batch of up to ``batch_size`` records instead of once per record.
+    """
+
+    def __init__(self, log_queue, *handlers, batch_size: int = 100):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self):
+        # Wait for room rather than failing when the queue is full.
+        self.queue.put(self._sentinel)
+
+    def _flush(self):
+        for handler in self.handlers:
+            try:
+                if isinstance(handler, BatchFlushMixin):
+                    handler.flush_batch()
+                else:
+                    handler.flush()
+            except (OSError, ValueError):
+                # The stream was closed under us, e.g. stderr at interpreter
+                # shutdown; keep the writer thread alive for the other handlers.
+                pass
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - [%(correlation_id)s] - %(message)s"
+    def _monitor(self):
+        log_queue = self.queue
+        while True:
+            record = log_queue.get()
+            batch = 0
+            while True:
+                if record is self._sentinel:
+                    log_queue.task_done()
+                    self._flush()
+                    return
+                self.handle(record)
+                log_queue.task_done()
+                batch += 1
+                if batch >= self.batch_size:
+                    break
+                try:
+                    record = log_queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._flush()
+
+
+def _file_handler(path: str) -> logging.Handler:
+    settings = get_settings()
+    if settings.log_rotate_when:
+        return BatchTimedRotatingFileHandler(
+            path,
+            when=settings.log_rotate_when,
+            backupCount=settings.log_backup_count,
+            encoding="utf-8",
+        )
+    return BatchRotatingFileHandler(
+        path,
+        maxBytes=settings.log_max_bytes,
+        backupCount=settings.log_backup_count,
+        encoding="utf-8",
     )
 
+
+_queue_handler = None
+_listener = None
+
+
+def _get_queue_handler() -> BoundedQueueHandler:
+    global _queue_handler, _listener
+    if _queue_handler is not None:
+        return _queue_handler
+
+    settings = get_settings()
+    if settings.log_format == "json":
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - %(levelname)s - [%(correlation_id)s] - %(message)s"
+        )
+
+    ch = BatchStreamHandler()
+    ch.setFormatter(formatter)
+    handlers = [ch]
+
+    # An empty LOG_FILE logs to stderr only; "{pid}" in it gives each worker
+    # process its own file.
+    if settings.log_file:
+        path = settings.log_file.format(pid=os.getpid())
+        # Create logs directory if it does not exist
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fh = _file_handler(path)
+        fh.setFormatter(formatter)
+        handlers.append(fh)
+
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    _queue_handler = BoundedQueueHandler(log_queue, settings.log_queue_policy)
+    _listener = BatchingQueueListener(log_queue, *handlers)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _queue_handler
+
+
+def _reset_after_fork():
+    # The writer thread does not exist in a forked child, so records put on
+    # the inherited queue would never be written; start over on first use.
+    global _queue_handler, _listener
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+    _queue_handler = None
+    _listener = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def stop_logging():
+    """
+    Writes out the records still queued and stops the writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _configure_logger(name) -> logging.Logger:
+    application_logger = logging.getLogger(name)
+
     correlation_id_filter = CorrelationIDFilter()
     application_logger.addFilter(correlation_id_filter)
+    return application_logger
 
-    ch = logging.StreamHandler()
-    ch.setFormatter(formatter)
-    application_logger.addHandler(ch)
 
-    # Create logs directory if it does not exist
-    if not os.path.exists("./logs"):
-        os.makedirs("./logs")
-    fh = logging.FileHandler("./logs/application.log")
-    fh.setFormatter(formatter)
-    application_logger.addHandler(fh)
+def get_logger(name):
+    application_logger = _configure_logger(name)
+    application_logger.setLevel(get_settings().log_level)
+    application_logger.addHandler(_get_queue_handler())
 
     return application_logger
 
 
-logger = get_logger(__name__)
+# The level, handlers, log directory and writer thread are only set up by
+# setup_logging, on startup or when the first message is logged.
+logger = _configure_logger(__name__)
+
+
+def setup_logging() -> logging.Logger:
+    if not logger.handlers:
+        logger.setLevel(get_settings().log_level)
+        logger.addHandler(_get_queue_handler())
+    return logger
 
 
 def log_info(message):
-    logger.info(message)
+    setup_logging().info(message)
 
 
 def log_debug(message):
-    logger.debug(message)
+    setup_logging().debug(message)
 
 
 def log_error(message):
-    logger.error(message)
+    setup_logging().error(message)
 
 
 def log_warning(message):
-    logger.warning(message)
+    setup_logging().warning(message)
 
 
 def log_critical(message):
-    logger.critical(message)
+    setup_logging().critical(message)
 
 
 def log_exception(message):
-    logger.exception(message)
+    setup_logging().exception(message)
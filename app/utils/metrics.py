@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import asyncio
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from app.config import get_settings
+from app.utils.logger import log_warning
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS
+
+Labels = Tuple[str, ...]
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def snapshot(self) -> dict:
+        return {
+            "type": "counter",
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(labels), value] for labels, value in self.values.items()],
+        }
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (the last one is +Inf), sum, count]
+        self.values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "type": "histogram",
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "samples": [
+                [list(labels), [list(counts), total, count]]
+                for labels, (counts, total, count) in self.values.items()
+            ],
+        }
+
+
+class MetricsRegistry:
+    """
+    Per-process metrics, rendered in the Prometheus text format.
+
+    Metrics are only recorded from the event loop thread, so updates are
+    plain dict operations without locks. With several workers, each one
+    periodically writes a snapshot to ``metrics_dir`` and ``render`` sums
+    the snapshots of all workers; the directory should be emptied before the
+    server starts. Unless given, ``metrics_dir`` and ``flush_seconds`` are
+    read from the settings on first use.
+    """
+
+    def __init__(
+        self,
+        metrics_dir: Optional[str] = None,
+        flush_seconds: Optional[float] = None,
+    ):
+        self._metrics_dir = metrics_dir
+        self._flush_seconds = flush_seconds
+        self.metrics: Dict[str, Counter | Histogram] = {}
+        self._flushed_at = 0.0
+        self._flush: Optional[asyncio.Future] = None
+
+    @property
+    def metrics_dir(self) -> str:
+        if self._metrics_dir is None:
+            self._metrics_dir = get_settings().metrics_dir
+        return self._metrics_dir
+
+    @metrics_dir.setter
+    def metrics_dir(self, metrics_dir: str) -> None:
+        self._metrics_dir = metrics_dir
+
+    @property
+    def flush_seconds(self) -> float:
+        if self._flush_seconds is None:
+            self._flush_seconds = get_settings().metrics_flush_seconds
+        return self._flush_seconds
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.metrics.setdefault(
+            name, Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.metrics_dir, f"worker-{os.getpid()}.json")
+
+    def write_snapshot(self, snapshot: dict) -> None:
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        path = self._snapshot_path()
+        with open(f"{path}.tmp", "w") as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+        os.replace(f"{path}.tmp", path)
+
+    def maybe_flush(self) -> None:
+        """
+        Writes this worker's snapshot off the event loop, at most every
+        ``flush_seconds`` and never while the previous write is still running.
+        """
+        if not self.metrics_dir or (self._flush and not self._flush.done()):
+            return
+        now = time.monotonic()
+        if now - self._flushed_at < self.flush_seconds:
+            return
+        self._flushed_at = now
+        snapshot = self.snapshot()
+        self._flush = asyncio.get_running_loop().run_in_executor(
+            None, self.write_snapshot, snapshot
+        )
+        self._flush.add_done_callback(_log_flush_failure)
+
+    def _collect(self, own: dict) -> List[dict]:
+        if not self.metrics_dir or not os.path.isdir(self.metrics_dir):
+            return [own]
+        snapshots = [own]
+        own_path = self._snapshot_path()
+        for name in os.listdir(self.metrics_dir):
+            path = os.path.join(self.metrics_dir, name)
+            if not name.endswith(".json") or path == own_path:
+                continue
+            try:
+                with open(path) as snapshot_file:
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self, snapshot: dict | None = None) -> str:
+        """
+        Returns the metrics of all workers in the Prometheus text format.
+
+        Pass this worker's ``snapshot``, taken on the event loop thread, when
+        calling from another thread.
+        """
+        own = self.snapshot() if snapshot is None else snapshot
+        merged: Dict[str, dict] = {}
+        for snapshot in self._collect(own):
+            for name, metric in snapshot.items():
+                target = merged.setdefault(name, {**metric, "samples": {}})
+                for labels, value in metric["samples"]:
+                    key = tuple(labels)
+                    target["samples"][key] = _add(target["samples"].get(key), value)
+
+        lines = []
+        for name, metric in merged.items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labelnames = metric["labelnames"]
+            for labels, value in sorted(metric["samples"].items()):
+                pairs = list(zip(labelnames, labels))
+                if metric["type"] == "counter":
+                    lines.append(f"{name}{_format_labels(pairs)} {value}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                bounds = [*metric["buckets"], "+Inf"]
+                for bound, bucket_count in zip(bounds, counts):
+                    cumulative += bucket_count
+                    le = _format_labels(pairs + [("le", str(bound))])
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(pairs)} {total}")
+                lines.append(f"{name}_count{_format_labels(pairs)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _log_flush_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        log_warning(f"Metrics snapshot flush failed: {future.exception()!r}")
+
+
+def _add(current, value):
+    if current is None:
+        return value
+    if isinstance(value, list):
+        counts = [a + b for a, b in zip(current[0], value[0])]
+        return [counts, current[1] + value[1], current[2] + value[2]]
+    return current + value
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "Number of HTTP requests.",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency.",
+    ("method", "route", "status"),
+)
+stage_duration = registry.histogram(
+    "stage_duration_seconds",
+    "Time spent in internal stages of a request.",
+    ("stage",),
+    STAGE_BUCKETS,
+)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """
+    Records how long the block takes as the given stage, e.g. "db_query".
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_duration.observe(time.perf_counter() - started, stage)
@@ -0,0 +1,45 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from typing import Any, Dict
+
+from app.config import get_settings
+from app.utils.exception import ValidationError
+
+SIGNATURE_SIZE = 16
+
+
+def _sign(data: bytes) -> bytes:
+    key = get_settings().crypto_secret.encode("utf-8")
+    return hmac.new(key, data, hashlib.sha256).digest()[:SIGNATURE_SIZE]
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encodes the keyset position of the last row of a page as an opaque,
+    signed cursor string.
+    """
+    data = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(_sign(data) + data).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decodes a cursor created by ``encode_cursor``.
+
+    Raises:
+        ValidationError: If the cursor is malformed or was tampered with.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        signature, data = raw[:SIGNATURE_SIZE], raw[SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, _sign(data)):
+            raise ValueError("Invalid signature")
+        values = json.loads(data)
+    except (ValueError, binascii.Error) as exc:
+        raise ValidationError("Invalid cursor.") from exc
+    if not isinstance(values, dict):
+        raise ValidationError("Invalid cursor.")
+    return values
@@ -0,0 +1,98 @@
+import os
+import re
+import json
+import cProfile
+from datetime import datetime, UTC
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.config import get_settings
+
+PROFILE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ProfileStore:
+    """
+    Saves request profiles as ``<profile ID>.prof`` files (pstats format),
+    with optional metadata in a ``<profile ID>.json`` file next to each, and
+    keeps only the ``max_files`` most recent ones.
+    """
+
+    def __init__(self, directory: str, max_files: int = 100):
+        self.directory = directory
+        self.max_files = max_files
+
+    def path_for(self, profile_id: str) -> Optional[str]:
+        """
+        Returns the file path of a profile, or None if the ID is not a safe
+        file name (profile IDs come from the admin route's URL).
+        """
+        if not PROFILE_ID.match(profile_id):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.prof")
+
+    def save(
+        self,
+        profiler: cProfile.Profile,
+        profile_id: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        path = self.path_for(profile_id)
+        if path is None:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(path)
+        if metadata:
+            with open(self._metadata_path(path), "w") as file:
+                json.dump(metadata, file)
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        profiles = sorted(self._files().items(), key=lambda item: item[1].st_mtime)
+        for name, _ in profiles[: max(len(profiles) - self.max_files, 0)]:
+            path = os.path.join(self.directory, name)
+            os.remove(path)
+            if os.path.exists(self._metadata_path(path)):
+                os.remove(self._metadata_path(path))
+
+    @staticmethod
+    def _metadata_path(path: str) -> str:
+        return path[: -len(".prof")] + ".json"
+
+    def _metadata(self, name: str) -> Dict[str, Any]:
+        path = self._metadata_path(os.path.join(self.directory, name))
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _files(self) -> Dict[str, os.stat_result]:
+        if not os.path.isdir(self.directory):
+            return {}
+        return {
+            entry.name: entry.stat()
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".prof")
+        }
+
+    def list(self) -> List[dict]:
+        """
+        Returns the saved profiles, newest first.
+        """
+        profiles = [
+            {
+                **self._metadata(name),
+                "id": name[: -len(".prof")],
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime, UTC),
+            }
+            for name, stat in self._files().items()
+        ]
+        return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore:
+    settings = get_settings()
+    return ProfileStore(settings.profiling_dir, settings.profiling_max_files)
@@ -0,0 +1,17 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Serializes the content, pydantic models included, to JSON in one pass
+    with pydantic-core, instead of ``jsonable_encoder`` followed by
+    ``json.dumps``.
+
+    Returning it from a route also skips FastAPI's response model
+    validation, so the content must already be the declared response schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -0,0 +1,270 @@
+import asyncio
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.utils.logger import log_warning
+
+RevocationEntry = Tuple[str, float, float]
+
+
+class RevocationStore:
+    """
+    Persistent backend of the revocation list.
+
+    Entries are (key, expires_at, revoked_at) tuples. ``load`` returns the
+    entries added after a cursor so every worker can pick up revocations made
+    by the others. ``durable`` stores keep their entries across restarts and
+    share them between workers.
+    """
+
+    durable = False
+
+    def add(self, key: str, expires_at: float, revoked_at: float) -> None:
+        self.add_many([(key, expires_at, revoked_at)])
+
+    def add_many(self, entries: Sequence[RevocationEntry]) -> None:
+        raise NotImplementedError
+
+    def load(self, cursor: int = 0) -> Tuple[int, List[RevocationEntry]]:
+        raise NotImplementedError
+
+    def purge(self, now: float) -> None:
+        raise NotImplementedError
+
+
+class MemoryRevocationStore(RevocationStore):
+    """
+    Process-local store, suitable for a single worker and for tests.
+    """
+
+    def __init__(self):
+        self._entries: List[RevocationEntry] = []
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def add_many(self, entries: Sequence[RevocationEntry]) -> None:
+        with self._lock:
+            self._entries.extend(entries)
+
+    def load(self, cursor: int = 0) -> Tuple[int, List[RevocationEntry]]:
+        with self._lock:
+            start = max(cursor - self._offset, 0)
+            return self._offset + len(self._entries), self._entries[start:]
+
+    def purge(self, now: float) -> None:
+        # Cursors point past the end of the list, so dropping entries moves
+        # the offset by the same amount to keep them valid.
+        with self._lock:
+            active = [entry for entry in self._entries if entry[1] > now]
+            self._offset += len(self._entries) - len(active)
+            self._entries = active
+
+
+class SqliteRevocationStore(RevocationStore):
+    """
+    Store backed by a local SQLite file shared by all workers on the host.
+    """
+
+    durable = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection inherited from the parent process by fork must not be
+        # used (or closed) by the child; open a new one instead.
+        if self._connection is None or self._connection_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS revoked_tokens ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "key TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, "
+                "revoked_at REAL NOT NULL)"
+            )
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def add_many(self, entries: Sequence[RevocationEntry]) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "INSERT INTO revoked_tokens (key, expires_at, revoked_at) "
+                "VALUES (?, ?, ?)",
+                entries,
+            )
+            connection.commit()
+
+    def load(self, cursor: int = 0) -> Tuple[int, List[RevocationEntry]]:
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT seq, key, expires_at, revoked_at FROM revoked_tokens "
+                    "WHERE seq > ? ORDER BY seq",
+                    (cursor,),
+                )
+                .fetchall()
+            )
+        if rows:
+            cursor = rows[-1][0]
+        return cursor, [row[1:] for row in rows]
+
+    def purge(self, now: float) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "DELETE FROM revoked_tokens WHERE expires_at <= ?", (now,)
+            )
+            connection.commit()
+
+
+class RevocationList:
+    """
+    In-memory index of revoked keys in front of a ``RevocationStore``.
+
+    Lookups are a single dict access and never touch the store. Entries are
+    dropped once they expire, using a heap ordered by expiry. A background
+    thread pulls the entries written by other workers every ``sync_seconds``
+    and purges expired rows from the store every ``purge_seconds``; it is
+    started by ``start`` or, failing that, by the first lookup.
+    """
+
+    def __init__(
+        self,
+        store: RevocationStore,
+        sync_seconds: float = 5,
+        purge_seconds: float = 3600,
+    ):
+        self.store = store
+        self.sync_seconds = sync_seconds
+        self.purge_seconds = purge_seconds
+        self._entries: Dict[str, Tuple[float, float]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._cursor = 0
+        self._purged_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stopped: Optional[threading.Event] = None
+        self._thread_pid: Optional[int] = None
+
+    def _index(self, key: str, expires_at: float, revoked_at: float) -> None:
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None:
+                if current[0] >= expires_at and current[1] >= revoked_at:
+                    return
+                expires_at = max(expires_at, current[0])
+                revoked_at = max(revoked_at, current[1])
+            self._entries[key] = (expires_at, revoked_at)
+            if current is None or current[0] != expires_at:
+                heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    def _compact(self, now: float) -> None:
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, key = heapq.heappop(self._expiry_heap)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == expires_at:
+                    del self._entries[key]
+
+    def sync(self) -> None:
+        """
+        Pulls the entries added to the store since the last sync, and purges
+        the store when due. Blocks on the store: call it off the event loop.
+        """
+        with self._sync_lock:
+            now = time.time()
+            self._cursor, entries = self.store.load(self._cursor)
+            for key, expires_at, revoked_at in entries:
+                if expires_at > now:
+                    self._index(key, expires_at, revoked_at)
+            if time.monotonic() - self._purged_at >= self.purge_seconds:
+                self.store.purge(now)
+                self._purged_at = time.monotonic()
+
+    def _run(self, stopped: threading.Event) -> None:
+        while True:
+            try:
+                self.sync()
+            except Exception as exc:
+                log_warning(f"Revocation list sync failed: {exc!r}")
+            if stopped.wait(self.sync_seconds):
+                return
+
+    def _ensure_syncing(self) -> None:
+        # Threads do not survive a fork, so each worker starts its own.
+        if self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        self._stopped = threading.Event()
+        threading.Thread(
+            target=self._run, args=(self._stopped,), name="revocation-sync", daemon=True
+        ).start()
+
+    async def start(self) -> None:
+        """
+        Loads the store and starts the background sync, so the first requests
+        already see the revocations made before this process started.
+        """
+        await asyncio.to_thread(self.sync)
+        self._ensure_syncing()
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+        self._thread_pid = None
+
+    def revoked_at(self, key: str) -> Optional[float]:
+        """
+        Returns when the key was revoked, or None if it is not revoked.
+        """
+        self._ensure_syncing()
+        now = time.time()
+        if self._expiry_heap and self._expiry_heap[0][0] <= now:
+            self._compact(now)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now:
+            return None
+        return entry[1]
+
+    def is_revoked(self, key: str) -> bool:
+        return self.revoked_at(key) is not None
+
+    async def revoke(
+        self, key: str, expires_at: float, revoked_at: Optional[float] = None
+    ) -> None:
+        """
+        Revokes the key until ``expires_at``. The in-memory index is updated
+        immediately and the store write runs off the event loop.
+        """
+        await self.revoke_many([key], expires_at, revoked_at)
+
+    async def revoke_many(
+        self, keys: Sequence[str], expires_at: float, revoked_at: Optional[float] = None
+    ) -> None:
+        """
+        Revokes the keys until ``expires_at`` with a single store write.
+        """
+        revoked_at = time.time() if revoked_at is None else revoked_at
+        entries = [(key, expires_at, revoked_at) for key in keys]
+        for entry in entries:
+            self._index(*entry)
+        if entries:
+            await asyncio.to_thread(self.store.add_many, entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
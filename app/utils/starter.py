@@ -1,8 +1,9 @@
+import asyncio
 import getpass
 from app.services.user import UserService
 from app.models.user import Users
-from app.models.database import get_session
-from app.config import settings
+from app.models.database import async_session
+from app.config import get_settings
 from app.utils.logger import log_info
 
 
@@ -15,25 +16,26 @@ def _prompt_for_password():
         print("Passwords do not match. Please try again.")
 
 
-def insert_root_user():
-    session = next(get_session())
-    user_service = UserService(session)
-    root_user = user_service.get_by_email(settings.root_user_email)
-    if root_user:
-        log_info("Root user already exists.")
-        return
+async def insert_root_user():
+    settings = get_settings()
+    async with async_session() as session:
+        user_service = UserService(session)
+        root_user = await user_service.get_by_email(settings.root_user_email)
+        if root_user:
+            log_info("Root user already exists.")
+            return
 
-    log_info("Root user not found, creating one...")
-    password = (
-        _prompt_for_password()
-        if not settings.root_user_password or settings.root_user_password == ""
-        else settings.root_user_password
-    )
-    model = Users(
-        email=settings.root_user_email,
-        first_name="root",
-        last_name="root",
-        password=password,
-    )
-    user_service.create(model)
-    log_info("Root user created.")
+        log_info("Root user not found, creating one...")
+        password = (
+            await asyncio.to_thread(_prompt_for_password)
+            if not settings.root_user_password or settings.root_user_password == ""
+            else settings.root_user_password
+        )
+        model = Users(
+            email=settings.root_user_email,
+            first_name="root",
+            last_name="root",
+            password=password,
+        )
+        await user_service.create(model)
+        log_info("Root user created.")
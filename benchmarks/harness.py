@@ -0,0 +1,208 @@
+"""
+Minimal benchmark harness: calibrated timing rounds, summary statistics and
+JSON baselines that later runs are compared against.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Set
+from dotenv import dotenv_values
+
+DEFAULT_DATABASE_URL = "sqlite:///./data/benchmark.db"
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rounds: int
+    iterations: int
+    min: float
+    median: float
+    mean: float
+    stddev: float
+
+    @property
+    def ops(self) -> float:
+        return 1 / self.median if self.median else 0.0
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of the samples, e.g. 0.99 for p99.
+    """
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summarize(name: str, timings: List[float], iterations: int) -> BenchmarkResult:
+    return BenchmarkResult(
+        name=name,
+        rounds=len(timings),
+        iterations=iterations,
+        min=min(timings),
+        median=statistics.median(timings),
+        mean=statistics.fmean(timings),
+        stddev=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    )
+
+
+def bench(
+    name: str,
+    func: Callable[[], object],
+    rounds: int = 20,
+    min_round_time: float = 0.01,
+) -> BenchmarkResult:
+    """
+    Times ``func`` over ``rounds`` rounds and returns the per-call statistics.
+    """
+
+    def run_round(iterations: int) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return time.perf_counter() - started
+
+    iterations = 1
+    while run_round(iterations) < min_round_time and iterations < 1_000_000:
+        iterations *= 10
+    timings = [run_round(iterations) / iterations for _ in range(rounds)]
+    return _summarize(name, timings, iterations)
+
+
+async def bench_async(
+    name: str,
+    func: Callable[[], Awaitable[object]],
+    rounds: int = 20,
+    min_round_time: float = 0.01,
+) -> BenchmarkResult:
+    """
+    Async variant of ``bench``: awaits ``func()`` on the running event loop.
+    """
+
+    async def run_round(iterations: int) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await func()
+        return time.perf_counter() - started
+
+    iterations = 1
+    while await run_round(iterations) < min_round_time and iterations < 1_000_000:
+        iterations *= 10
+    timings = [await run_round(iterations) / iterations for _ in range(rounds)]
+    return _summarize(name, timings, iterations)
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def report(results: Iterable[BenchmarkResult]) -> None:
+    print(f"{'name':<40} {'min':>11} {'median':>11} {'stddev':>11} {'ops/s':>12}")
+    for result in results:
+        print(
+            f"{result.name:<40} {_format_time(result.min):>11} "
+            f"{_format_time(result.median):>11} {_format_time(result.stddev):>11} "
+            f"{result.ops:>12,.0f}"
+        )
+
+
+def save_baseline(metrics: Dict[str, float], path: str) -> None:
+    """
+    Saves metrics (lower is better, e.g. seconds per call or p99 latency).
+    """
+    with open(path, "w") as baseline_file:
+        json.dump(metrics, baseline_file, indent=2, sort_keys=True)
+
+
+def compare_baseline(
+    metrics: Dict[str, float], path: str, tolerance: float = 0.2
+) -> List[str]:
+    """
+    Compares metrics against a saved baseline.
+
+    Returns:
+        One message per metric that is more than ``tolerance`` (a fraction)
+        slower than its baseline value.
+    """
+    with open(path) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = []
+    for name, value in metrics.items():
+        previous = baseline.get(name)
+        if previous and value > previous * (1 + tolerance):
+            regressions.append(
+                f"{name}: {_format_time(value)} vs baseline "
+                f"{_format_time(previous)} (+{value / previous - 1:.0%})"
+            )
+    return regressions
+
+
+def as_metrics(results: Iterable[BenchmarkResult]) -> Dict[str, float]:
+    return {result.name: result.median for result in results}
+
+
+def add_baseline_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--save", metavar="PATH", help="save results as a baseline")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="exit with status 1 if slower than PATH"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed slowdown before --compare fails (default: 0.2 = 20%%)",
+    )
+
+
+def check_baseline(metrics: Dict[str, float], args: argparse.Namespace) -> int:
+    """
+    Saves and/or compares a baseline as requested on the command line and
+    returns the process exit status.
+    """
+    if args.save:
+        save_baseline(metrics, args.save)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        regressions = compare_baseline(metrics, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+def configured_database_urls() -> Set[str]:
+    """
+    Returns the database URLs the app would otherwise use, from the
+    environment and from .env.
+    """
+    sources = [os.environ, dotenv_values(".env")]
+    names = ("DATABASE_URL", "DATABASE_REPLICA_URLS")
+    return {
+        value
+        for source in sources
+        for key, value in source.items()
+        if key.upper() in names and value
+    }
+
+
+def use_database(database_url: str) -> None:
+    """
+    Points the app at the benchmark database, without replicas. Must run
+    before anything reads the settings.
+    """
+    if any(database_url in url for url in configured_database_urls()):
+        raise SystemExit(
+            f"Refusing to use {database_url}: it is the configured database."
+        )
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DATABASE_REPLICA_URLS"] = "[]"
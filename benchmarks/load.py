@@ -0,0 +1,155 @@
+"""
+HTTP load scenario against the in-process app: each virtual user logs in,
+refreshes its token, lists users and fetches one user, in a loop.
+Reports p50/p99 latency and throughput per endpoint.
+
+Uses its own database, ``--database-url`` (``./data/benchmark.db`` by
+default), which is dropped and recreated on every run. DATABASE_URL from
+the environment or .env is never used, and the run refuses a
+``--database-url`` that matches it. Run from the repository root:
+
+    python -m benchmarks.load --concurrency 20 --duration 10
+    python -m benchmarks.load --save benchmarks/baselines/load.json
+    python -m benchmarks.load --compare benchmarks/baselines/load.json
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+import httpx
+from sqlmodel import SQLModel
+from app.models.database import (
+    async_session,
+    create_db_and_tables,
+    dispose_engines,
+    get_engine,
+)
+from app.models.user import Users
+from app.services.user import UserService
+from benchmarks.harness import (
+    DEFAULT_DATABASE_URL,
+    add_baseline_arguments,
+    check_baseline,
+    percentile,
+    use_database,
+)
+from run import app
+
+PASSWORD = "benchmark-password"
+
+
+async def seed(users: int) -> List[str]:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+    await create_db_and_tables()
+    emails = [f"load{index}@example.com" for index in range(users)]
+    async with async_session() as session:
+        await UserService(session).bulk_create(
+            [
+                Users(
+                    email=email, password=PASSWORD, first_name="Load", last_name="User"
+                )
+                for email in emails
+            ]
+        )
+    return emails
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    email: str,
+    deadline: float,
+    latencies: Dict[str, List[float]],
+) -> None:
+    async def call(name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            latencies[f"{name} errors"].append(0.0)
+        return response
+
+    while time.perf_counter() < deadline:
+        tokens = (
+            await call(
+                "login",
+                "POST",
+                "/api/auth/login",
+                json={"email": email, "password": PASSWORD},
+            )
+        ).json()
+        refresh = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+        await call("refresh", "POST", "/api/auth/refresh", headers=refresh)
+
+        auth = {"Authorization": f"Bearer {tokens['access_token']}"}
+        page = (
+            await call("list users", "GET", "/api/users/?limit=20", headers=auth)
+        ).json()
+        user_id = page["items"][-1]["id"]
+        await call("get user", "GET", f"/api/users/{user_id}", headers=auth)
+
+
+async def run(concurrency: int, duration: float) -> Dict[str, List[float]]:
+    emails = await seed(concurrency)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(virtual_user(client, email, deadline, latencies) for email in emails)
+        )
+        elapsed = time.perf_counter() - started
+    await dispose_engines()
+    latencies["elapsed"] = [elapsed]
+    return latencies
+
+
+def summarize(latencies: Dict[str, List[float]]) -> Dict[str, float]:
+    elapsed = latencies.pop("elapsed")[0]
+    metrics = {}
+    total = 0
+    header = ("endpoint", "requests", "errors", "p50", "p99", "req/s")
+    print("{:<14} {:>9} {:>7} {:>10} {:>10} {:>9}".format(*header))
+    for name, samples in latencies.items():
+        if name.endswith(" errors"):
+            continue
+        errors = len(latencies.get(f"{name} errors", []))
+        total += len(samples)
+        p50, p99 = percentile(samples, 0.5), percentile(samples, 0.99)
+        metrics[f"{name} p50"] = p50
+        metrics[f"{name} p99"] = p99
+        print(
+            f"{name:<14} {len(samples):>9} {errors:>7} {p50 * 1000:>8.1f}ms "
+            f"{p99 * 1000:>8.1f}ms {len(samples) / elapsed:>9.1f}"
+        )
+    print(f"{'total':<14} {total:>9} {'':>7} {'':>10} {'':>10} {total / elapsed:>9.1f}")
+    # Stored as seconds per request so that, like latencies, lower is better.
+    metrics["seconds per request"] = elapsed / total
+    return metrics
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--database-url",
+        default=DEFAULT_DATABASE_URL,
+        help=f"database to recreate for the run (default: {DEFAULT_DATABASE_URL})",
+    )
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    use_database(args.database_url)
+
+    metrics = summarize(asyncio.run(run(args.concurrency, args.duration)))
+    return check_baseline(metrics, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Micro-benchmarks for the auth hot paths: JWT encoding and decoding, password
+hashing, response serialization (per row, for 100- and 1000-row pages) and a
+paged user query.
+
+Run from the repository root:
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --save benchmarks/baselines/micro.json
+    python -m benchmarks.micro --compare benchmarks/baselines/micro.json
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import sys
+import warnings
+from fastapi import Response
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.user import Users
+from app.schemas.user import UserListResponse, UserResponse
+from app.security import _create_jwt_token, _get_jwt_payload, verified_claims
+from app.services.base import BaseService
+from app.utils.crypto import hash_password, verify_password
+from app.utils.responses import FastJSONResponse
+from benchmarks.harness import (
+    BenchmarkResult,
+    add_baseline_arguments,
+    as_metrics,
+    bench,
+    bench_async,
+    check_baseline,
+    report,
+)
+
+
+def sample_user(index: int = 1) -> Users:
+    return Users(
+        id=index,
+        email=f"user{index}@example.com",
+        first_name="Bench",
+        last_name="User",
+        password="unused",
+        phone_number="1234567890",
+    )
+
+
+async def bench_jwt(rounds: int):
+    user = sample_user()
+    token = _create_jwt_token(user, "access")
+
+    async def decode():
+        # Clear the per-request cache so every call verifies the signature.
+        verified_claims.set(None)
+        await _get_jwt_payload(token)
+
+    return [
+        bench("_create_jwt_token", lambda: _create_jwt_token(user, "access"), rounds),
+        await bench_async("_get_jwt_payload", decode, rounds),
+    ]
+
+
+def bench_passwords(rounds: int):
+    hashed = hash_password("benchmark-password")
+    return [
+        bench("hash_password", lambda: hash_password("benchmark-password"), rounds),
+        bench(
+            "verify_password",
+            lambda: verify_password("benchmark-password", hashed),
+            rounds,
+        ),
+    ]
+
+
+def per_row(result: BenchmarkResult, rows: int) -> BenchmarkResult:
+    return dataclasses.replace(
+        result,
+        name=f"{result.name} per row",
+        min=result.min / rows,
+        median=result.median / rows,
+        mean=result.mean / rows,
+        stddev=result.stddev / rows,
+    )
+
+
+async def bench_serialization(rounds: int):
+    user = sample_user()
+    results = [
+        bench("UserResponse.from_model", lambda: UserResponse.from_model(user), rounds)
+    ]
+    # The response field FastAPI builds for a route annotated as returning
+    # UserListResponse, which is how the user routes used to respond.
+    response_field = create_model_field(
+        name="Response_get_users", type_=UserListResponse, mode="serialization"
+    )
+    for rows in (100, 1000):
+        users = [sample_user(index) for index in range(1, rows + 1)]
+
+        async def dict_copy():
+            # The former path: each row copied to a dict and validated again,
+            # then the page validated and serialized by FastAPI. The rows'
+            # deprecated .dict() is kept, without its warning.
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)
+                items = [UserResponse(**user.dict()) for user in users]
+            page = UserListResponse(items=items)
+            content = await serialize_response(
+                field=response_field, response_content=page, dump_json=True
+            )
+            Response(content=content, media_type="application/json")
+
+        def from_attributes():
+            page = UserListResponse(items=UserResponse.from_models(users))
+            FastJSONResponse(page)
+
+        results += [
+            per_row(
+                await bench_async(f"page of {rows}: dict copy", dict_copy, rounds),
+                rows,
+            ),
+            per_row(
+                bench(f"page of {rows}: from_attributes", from_attributes, rounds),
+                rows,
+            ),
+        ]
+    return results
+
+
+async def bench_fetch(rounds: int, rows: int = 1000):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        service = BaseService(session, Users)
+        users = [sample_user(index) for index in range(1, rows + 1)]
+        for user in users:
+            user.id = None
+        await service.bulk_create(users)
+        session.expunge_all()
+
+        async def fetch():
+            await service.fetch(limit=100)
+            session.expunge_all()
+
+        async def fetch_fields():
+            await service.fetch(limit=100, fields=["email", "first_name"])
+
+        results = [
+            await bench_async("BaseService.fetch(limit=100)", fetch, rounds),
+            await bench_async(
+                "BaseService.fetch(limit=100, fields=2)", fetch_fields, rounds
+            ),
+        ]
+    await engine.dispose()
+    return results
+
+
+async def run(rounds: int):
+    results = await bench_jwt(rounds)
+    results += bench_passwords(max(rounds // 4, 3))
+    results += await bench_serialization(rounds)
+    results += await bench_fetch(rounds)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=20)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.rounds))
+    report(results)
+    return check_baseline(as_metrics(results), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
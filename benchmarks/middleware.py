@@ -0,0 +1,90 @@
+"""
+Compares request throughput of the request-context middleware written as a
+pure ASGI middleware against the previous pair of ``@app.middleware("http")``
+functions (BaseHTTPMiddleware).
+
+Run from the repository root:
+
+    python -m benchmarks.middleware --requests 5000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from fastapi import FastAPI, Request
+import httpx
+from app.middleware.request_context import RequestContextMiddleware
+from app.security import set_current_user_id
+from app.utils.logger import set_correlation_id
+
+
+def base_http_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def correlation_id_middleware(request: Request, call_next):
+        correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
+        set_correlation_id(correlation_id)
+        response = await call_next(request)
+        response.headers["X-Correlation-ID"] = correlation_id
+        return response
+
+    @app.middleware("http")
+    async def current_user_id_middleware(request: Request, call_next):
+        if "Authorization" in request.headers:
+            parts = request.headers["Authorization"].split(" ")
+            if len(parts) == 2 and parts[0].lower() == "bearer":
+                token = parts[1]
+                if token:
+                    await set_current_user_id(token)
+        return await call_next(request)
+
+    app.get("/")(lambda: {"message": "Hello, World!"})
+    return app
+
+
+def pure_asgi_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+    app.get("/")(lambda: {"message": "Hello, World!"})
+    return app
+
+
+async def measure(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/")
+                assert "x-correlation-id" in response.headers
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, concurrency: int) -> None:
+    apps = {"BaseHTTPMiddleware": base_http_app(), "pure ASGI": pure_asgi_app()}
+    # Warm up both apps before measuring.
+    for app in apps.values():
+        await measure(app, 200, concurrency)
+    results = {
+        name: await measure(app, requests, concurrency) for name, app in apps.items()
+    }
+    for name, rps in results.items():
+        print(f"{name:>20}: {rps:8.0f} req/s")
+    baseline = results["BaseHTTPMiddleware"]
+    print(f"{'speedup':>20}: {results['pure ASGI'] / baseline:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,177 @@
+"""
+Multi-worker scaling on the JWT-verify path: starts ``python -m app.server``
+with an increasing number of workers and measures the throughput of an
+authenticated ``GET /api/users/{id}``. The claims cache is off, so every
+request verifies the token signature, and the identity cache is on, so the
+database is rarely touched.
+
+Uses its own SQLite database, ``./data/benchmark.db``; DATABASE_URL from the
+environment or .env is never used. Run from the repository root:
+
+    python -m benchmarks.scaling --workers 1 2 4 --duration 10
+    python -m benchmarks.scaling --save benchmarks/baselines/scaling.json
+    python -m benchmarks.scaling --compare benchmarks/baselines/scaling.json
+"""
+
+import os
+from benchmarks.harness import (
+    DEFAULT_DATABASE_URL,
+    add_baseline_arguments,
+    check_baseline,
+    use_database,
+)
+
+use_database(DEFAULT_DATABASE_URL)
+os.environ.setdefault("ROOT_USER_PASSWORD", "benchmark-password")
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["JWT_CLAIMS_CACHE_SIZE"] = "0"
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+import httpx
+from app.cli import init_db
+from app.config import get_settings
+from app.server import default_workers
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, timeout: float = 30) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "app.server",
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.perf_counter() + timeout
+    ready = set()
+    # Wait until every worker has answered the readiness check.
+    while len(ready) < workers and time.perf_counter() < deadline:
+        try:
+            response = httpx.get(f"http://127.0.0.1:{port}/health/ready")
+            if response.status_code == 200:
+                ready.add(response.json()["pid"])
+        except httpx.TransportError:
+            time.sleep(0.05)
+    if len(ready) < workers:
+        server.terminate()
+        raise TimeoutError(f"{workers} workers were not ready within {timeout}s")
+    return server
+
+
+def login(port: int) -> tuple[str, int]:
+    settings = get_settings()
+    response = httpx.post(
+        f"http://127.0.0.1:{port}/api/auth/login",
+        json={
+            "email": settings.root_user_email,
+            "password": settings.root_user_password,
+        },
+    )
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    me = httpx.get(
+        f"http://127.0.0.1:{port}/api/users/?limit=1",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    return token, me.json()["items"][0]["id"]
+
+
+async def _drive(url: str, token: str, connections: int, duration: float) -> int:
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.perf_counter() + duration
+    completed = 0
+
+    async def connection(client: httpx.AsyncClient):
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            if (await client.get(url, headers=headers)).status_code == 200:
+                completed += 1
+
+    limits = httpx.Limits(max_connections=connections)
+    async with httpx.AsyncClient(limits=limits) as client:
+        await asyncio.gather(*(connection(client) for _ in range(connections)))
+    return completed
+
+
+def drive(url: str, token: str, connections: int, duration: float) -> int:
+    return asyncio.run(_drive(url, token, connections, duration))
+
+
+def measure(
+    workers: int, clients: int, connections: int, duration: float
+) -> Dict[str, float]:
+    port = _free_port()
+    server = start_server(workers, port)
+    try:
+        token, user_id = login(port)
+        url = f"http://127.0.0.1:{port}/api/users/{user_id}"
+        # Several client processes, so the load generator is not the bottleneck.
+        with ProcessPoolExecutor(clients) as pool:
+            started = time.perf_counter()
+            futures = [
+                pool.submit(drive, url, token, connections, duration)
+                for _ in range(clients)
+            ]
+            completed = sum(future.result() for future in futures)
+            elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+    return {"requests": completed, "rps": completed / elapsed}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, default_workers()}),
+        help="worker counts to measure (default: 1 and the CPU quota)",
+    )
+    parser.add_argument("--clients", type=int, default=2, help="client processes")
+    parser.add_argument("--connections", type=int, default=16, help="per client")
+    parser.add_argument("--duration", type=float, default=10.0)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    asyncio.run(init_db(skip_root_user=False))
+    results: List[tuple[int, Dict[str, float]]] = []
+    for workers in args.workers:
+        result = measure(workers, args.clients, args.connections, args.duration)
+        results.append((workers, result))
+
+    print(f"{'workers':>7} {'requests':>9} {'req/s':>9} {'efficiency':>10}")
+    base = results[0][1]["rps"] / results[0][0]
+    metrics = {}
+    for workers, result in results:
+        efficiency = result["rps"] / (workers * base)
+        print(
+            f"{workers:>7} {result['requests']:>9} {result['rps']:>9.1f} "
+            f"{efficiency:>10.0%}"
+        )
+        # Stored as seconds per request so that lower is better.
+        metrics[f"{workers} workers seconds per request"] = 1 / result["rps"]
+    return check_baseline(metrics, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Cold start benchmark: the time to import ``run`` in a fresh interpreter and
+the time from launching uvicorn until it answers its first request.
+
+Run from the repository root:
+
+    python -m benchmarks.startup --rounds 5
+    python -m benchmarks.startup --save benchmarks/baselines/startup.json
+    python -m benchmarks.startup --compare benchmarks/baselines/startup.json
+"""
+
+from benchmarks.harness import (
+    DEFAULT_DATABASE_URL,
+    add_baseline_arguments,
+    check_baseline,
+    use_database,
+)
+
+# The server never touches DATABASE_URL from the environment or .env.
+use_database(DEFAULT_DATABASE_URL)
+
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+import httpx
+
+IMPORT_SCRIPT = (
+    "import time; started = time.perf_counter(); import run; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def import_time() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(timeout: float = 30) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "run:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            time.sleep(0.005)
+        raise TimeoutError(f"Server did not answer within {timeout} seconds")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(rounds: int) -> Dict[str, List[float]]:
+    samples: Dict[str, List[float]] = {"import run": [], "first request": []}
+    for _ in range(rounds):
+        samples["import run"].append(import_time())
+        samples["first request"].append(time_to_first_request())
+    return samples
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, float]:
+    metrics = {}
+    print(f"{'stage':<14} {'min':>10} {'median':>10} {'max':>10}")
+    for name, values in samples.items():
+        median = statistics.median(values)
+        metrics[name] = median
+        print(
+            f"{name:<14} {min(values) * 1000:>8.1f}ms {median * 1000:>8.1f}ms "
+            f"{max(values) * 1000:>8.1f}ms"
+        )
+    return metrics
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=5)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    metrics = summarize(run(args.rounds))
+    return check_baseline(metrics, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import unittest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from app.middleware.metrics import MetricsMiddleware
+from app.utils.metrics import http_requests
+
+
+class TestMetricsMiddleware(unittest.TestCase):
+    def setUp(self):
+        router = APIRouter()
+
+        @router.get("/{item_id}")
+        def item(item_id: int):
+            return {"id": item_id}
+
+        app = FastAPI()
+        app.include_router(router, prefix="/api/items")
+        app.add_middleware(MetricsMiddleware)
+        self.client = TestClient(app)
+
+    def test_labels_by_route_template(self):
+        labels = ("GET", "/api/items/{item_id}", "200")
+        before = http_requests.values.get(labels, 0)
+        self.client.get("/api/items/1")
+        self.client.get("/api/items/2")
+        self.assertEqual(http_requests.values[labels], before + 2)
+
+    def test_unmatched_routes_share_a_label(self):
+        labels = ("GET", "unmatched", "404")
+        before = http_requests.values.get(labels, 0)
+        self.client.get("/nope")
+        self.assertEqual(http_requests.values[labels], before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
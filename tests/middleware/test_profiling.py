@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+from app.utils.profiling import ProfileStore
+
+
+class TestProfilingMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ProfileStore(self.directory.name, max_files=2)
+        self.addCleanup(self.directory.cleanup)
+
+        app = FastAPI()
+        app.get("/")(lambda: {"message": "Hello, World!"})
+        app.add_middleware(
+            ProfilingMiddleware, token="secret", sample_rate=0, store=self.store
+        )
+        app.add_middleware(RequestContextMiddleware)
+        self.client = TestClient(app)
+
+    def test_profiles_request_with_token(self):
+        response = self.client.get(
+            "/", headers={"X-Profile-Token": "secret", "X-Correlation-ID": "abc"}
+        )
+        [profile] = self.store.list()
+        self.assertEqual(profile["id"], response.headers["X-Profile-ID"])
+        self.assertEqual(profile["correlation_id"], "abc")
+        self.assertEqual((profile["method"], profile["path"]), ("GET", "/"))
+
+    def test_ignores_wrong_token(self):
+        response = self.client.get("/", headers={"X-Profile-Token": "wrong"})
+        self.assertNotIn("X-Profile-ID", response.headers)
+        self.assertEqual(self.store.list(), [])
+
+    def test_profile_id_ignores_correlation_id(self):
+        ids = {
+            self.client.get(
+                "/", headers={"X-Profile-Token": "secret", "X-Correlation-ID": "abc"}
+            ).headers["X-Profile-ID"]
+            for _ in range(2)
+        }
+        self.assertEqual(len(ids), 2)
+        self.assertNotIn("abc", ids)
+        for profile_id in ids:
+            self.assertIsNotNone(self.store.path_for(profile_id))
+
+    def test_keeps_most_recent_profiles(self):
+        for correlation_id in ("a", "b", "c"):
+            self.client.get(
+                "/",
+                headers={
+                    "X-Profile-Token": "secret",
+                    "X-Correlation-ID": correlation_id,
+                },
+            )
+        self.assertEqual(len(self.store.list()), 2)
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            sorted(
+                profile["id"] + extension
+                for profile in self.store.list()
+                for extension in (".json", ".prof")
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.middleware.request_context import RequestContextMiddleware
+from app.models.user import Users
+from app.security import _create_jwt_token, get_current_user_id
+from app.utils.logger import get_correlation_id
+
+
+class TestRequestContextMiddleware(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+        app.add_middleware(RequestContextMiddleware)
+
+        @app.get("/context")
+        def context():
+            return {
+                "correlation_id": get_correlation_id(),
+                "user_id": get_current_user_id(),
+            }
+
+        @app.get("/stream")
+        def stream():
+            return StreamingResponse(iter([b"a", b"b"]))
+
+        self.client = TestClient(app)
+
+    def test_uses_given_correlation_id(self):
+        response = self.client.get("/context", headers={"X-Correlation-ID": "abc"})
+        self.assertEqual(response.headers["X-Correlation-ID"], "abc")
+        self.assertEqual(response.json()["correlation_id"], "abc")
+
+    def test_generates_correlation_id(self):
+        response = self.client.get("/context")
+        correlation_id = response.headers["X-Correlation-ID"]
+        self.assertEqual(len(correlation_id), 36)
+        self.assertEqual(response.json()["correlation_id"], correlation_id)
+
+    def test_sets_current_user_id(self):
+        user = Users(id=7, email="test@example.com", first_name="T", last_name="U")
+        headers = {"Authorization": f"Bearer {_create_jwt_token(user, 'access')}"}
+        self.assertEqual(
+            self.client.get("/context", headers=headers).json()["user_id"], 7
+        )
+        self.assertIsNone(self.client.get("/context").json()["user_id"])
+
+    def test_streaming_response_has_correlation_id(self):
+        response = self.client.get("/stream")
+        self.assertEqual(response.content, b"ab")
+        self.assertIn("X-Correlation-ID", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
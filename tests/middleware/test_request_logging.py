@@ -0,0 +1,79 @@
+import logging
+import unittest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from app.middleware.request_logging import Redactor, RequestLoggingMiddleware
+from app.utils.logger import logger
+
+
+class TestRedactor(unittest.TestCase):
+    def setUp(self):
+        self.redactor = Redactor(["Authorization"], ["password", "token"])
+
+    def test_redacts_headers(self):
+        headers = [("authorization", "Bearer abc"), ("accept", "*/*")]
+        self.assertEqual(
+            self.redactor.headers(headers),
+            [("authorization", "***"), ("accept", "*/*")],
+        )
+
+    def test_redacts_body_fields(self):
+        body = '{"email": "a@b.c", "password": "se\\"cret", "refresh_token": "x"}'
+        self.assertEqual(
+            self.redactor.body(body),
+            '{"email": "a@b.c", "password": "***", "refresh_token": "***"}',
+        )
+
+    def test_redacts_nested_and_list_values(self):
+        body = '{"password": ["a", "b"], "user": {"Token": {"x": 1}, "name": "n"}}'
+        self.assertEqual(
+            self.redactor.body(body),
+            '{"password": "***", "user": {"Token": "***", "name": "n"}}',
+        )
+
+    def test_redacts_escaped_keys(self):
+        self.assertEqual(
+            self.redactor.body('{"pass\\u0077ord": "secret"}'), '{"password": "***"}'
+        )
+
+    def test_redacts_truncated_body(self):
+        self.assertEqual(self.redactor.body('{"password": "sec'), '{"password": "***"')
+
+    def test_redacts_query(self):
+        self.assertEqual(self.redactor.query("token=abc&page=2"), "token=***&page=2")
+
+
+class TestRequestLoggingMiddleware(unittest.TestCase):
+    def _client(self, **options):
+        app = FastAPI()
+
+        @app.post("/echo")
+        async def echo(request: Request):
+            return await request.json()
+
+        app.add_middleware(RequestLoggingMiddleware, level="INFO", **options)
+        return TestClient(app)
+
+    def test_logs_redacted_and_capped_body(self):
+        client = self._client(body_max_bytes=32)
+        payload = {"password": "secret", "note": "x" * 100}
+        with self.assertLogs(logger, logging.INFO) as logs:
+            response = client.post(
+                "/echo", json=payload, headers={"Authorization": "Bearer abc"}
+            )
+        self.assertEqual(response.json(), payload)
+        message = logs.records[0].getMessage()
+        self.assertIn("POST /echo status=200", message)
+        self.assertIn('"password":"***"', message)
+        self.assertNotIn("secret", message)
+        self.assertNotIn("Bearer abc", message)
+        self.assertIn("bytes)", message)
+
+    def test_skips_unsampled_requests(self):
+        client = self._client(sample_rate=0)
+        with self.assertNoLogs(logger, logging.INFO):
+            client.post("/echo", json={})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.dialects.sqlite.base import SQLiteDialect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models import database
+from app.models.user import Users  # noqa: F401 (registers the table)
+from app.models.database import (
+    dispose_engines,
+    get_engine,
+    get_engine_options,
+    set_sqlite_pragmas,
+    upgrade_schema,
+)
+
+
+class TestEngineOptions(unittest.TestCase):
+    def test_network_database_defaults(self):
+        options = get_engine_options("postgresql://user@db/app")
+        self.assertEqual(options["pool_size"], 10)
+        self.assertTrue(options["pool_pre_ping"])
+        self.assertEqual(options["pool_recycle"], 1800)
+        self.assertNotIn("connect_args", options)
+
+    def test_sqlite_file_defaults(self):
+        options = get_engine_options("sqlite:///./data/app.db")
+        self.assertEqual(options["pool_size"], 5)
+        self.assertFalse(options["pool_pre_ping"])
+        self.assertEqual(options["connect_args"], {"check_same_thread": False})
+
+    def test_sqlite_memory_has_no_pool_options(self):
+        for url in ("sqlite://", "sqlite:///:memory:"):
+            self.assertEqual(
+                get_engine_options(url), {"connect_args": {"check_same_thread": False}}
+            )
+
+
+class TestSqlitePragmas(unittest.IsolatedAsyncioTestCase):
+    async def test_pragmas_applied_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.db")
+            engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+            event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+            async with engine.connect() as conn:
+                journal_mode = (
+                    await conn.execute(text("PRAGMA journal_mode"))
+                ).scalar()
+                busy_timeout = (
+                    await conn.execute(text("PRAGMA busy_timeout"))
+                ).scalar()
+                synchronous = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+            await engine.dispose()
+
+        self.assertEqual(journal_mode, "wal")
+        self.assertEqual(busy_timeout, 5000)
+        self.assertEqual(synchronous, 1)
+
+
+class TestCreateEngine(unittest.TestCase):
+    def test_requires_returning(self):
+        with patch.object(SQLiteDialect, "update_returning", False):
+            with self.assertRaises(ValueError):
+                database._create_engine("sqlite://")
+
+    def test_requires_partial_indexes(self):
+        with patch.object(database, "PARTIAL_INDEX_DIALECTS", ("postgresql",)):
+            with self.assertRaises(ValueError):
+                database._create_engine("sqlite://")
+
+
+class TestLazyEngine(unittest.IsolatedAsyncioTestCase):
+    async def test_engine_is_created_on_first_use(self):
+        await dispose_engines()
+        self.assertIsNone(database.engine)
+        engine = get_engine()
+        self.assertIs(get_engine(), engine)
+        await dispose_engines()
+        self.assertIsNone(database.engine)
+        self.assertIsNot(get_engine(), engine)
+
+
+# The users table as created before deleted users kept their email.
+LEGACY_USERS = """
+CREATE TABLE users (
+    id INTEGER NOT NULL,
+    created_user_id INTEGER,
+    created_at DATETIME NOT NULL,
+    updated_user_id INTEGER,
+    updated_at DATETIME,
+    is_deleted BOOLEAN NOT NULL,
+    email VARCHAR NOT NULL,
+    first_name VARCHAR NOT NULL,
+    last_name VARCHAR NOT NULL,
+    password VARCHAR NOT NULL,
+    phone_number VARCHAR(10),
+    teams_user_id VARCHAR(40),
+    push_token VARCHAR(255),
+    PRIMARY KEY (id),
+    FOREIGN KEY(created_user_id) REFERENCES users (id),
+    FOREIGN KEY(updated_user_id) REFERENCES users (id),
+    UNIQUE (email)
+)
+"""
+
+INSERT_USER = (
+    "INSERT INTO users (created_at, is_deleted, email, first_name, last_name,"
+    " password) VALUES ('2024-01-01 00:00:00', :is_deleted, :email, 'A', 'B', 'x')"
+)
+
+
+class TestUpgradeSchema(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.engine = create_engine(f"sqlite:///{directory.name}/legacy.db")
+        self.addCleanup(self.engine.dispose)
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(LEGACY_USERS)
+            conn.execute(text(INSERT_USER), {"is_deleted": True, "email": "a@b.c"})
+
+    def test_deleted_email_can_register_again(self):
+        with self.engine.begin() as conn:
+            with self.assertRaises(IntegrityError):
+                with conn.begin_nested():
+                    conn.execute(
+                        text(INSERT_USER), {"is_deleted": False, "email": "a@b.c"}
+                    )
+
+        with self.engine.begin() as conn:
+            upgrade_schema(conn)
+        with self.engine.begin() as conn:
+            conn.execute(text(INSERT_USER), {"is_deleted": False, "email": "a@b.c"})
+            emails = conn.execute(text("SELECT email, is_deleted FROM users")).all()
+        self.assertEqual(emails, [("a@b.c", 1), ("a@b.c", 0)])
+
+        with self.engine.begin() as conn:
+            with self.assertRaises(IntegrityError):
+                conn.execute(text(INSERT_USER), {"is_deleted": False, "email": "a@b.c"})
+
+    def test_creates_indexes_and_keeps_foreign_keys(self):
+        with self.engine.begin() as conn:
+            upgrade_schema(conn)
+            upgrade_schema(conn)
+            inspector = inspect(conn)
+            indexes = {index["name"] for index in inspector.get_indexes("users")}
+            foreign_keys = inspector.get_foreign_keys("users")
+            tables = inspector.get_table_names()
+        self.assertIn("ix_users_email_active", indexes)
+        self.assertIn("ix_users_is_deleted_id", indexes)
+        self.assertEqual({fk["referred_table"] for fk in foreign_keys}, {"users"})
+        self.assertEqual(tables, ["users"])
+
+
+if __name__ == "__main__":
+    unittest.main()
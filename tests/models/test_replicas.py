@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from itertools import cycle
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import database
+from app.models.database import RoutingSession
+from app.models.user import Users
+from app.security import current_user_id
+from app.services.user import UserService
+from app.utils.cache import Cache, MemoryCacheBackend
+
+
+class TestReplicaRouting(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.primary = await self._create_database("primary.db", "primary@example.com")
+        self.replica = await self._create_database("replica.db", "replica@example.com")
+        self.replica2 = await self._create_database(
+            "replica2.db", "replica2@example.com"
+        )
+
+        replicas = [self.replica, self.replica2]
+        patcher = patch.multiple(
+            database,
+            replica_engines=replicas,
+            _replicas=cycle(replicas),
+            _recent_writers={},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.session = AsyncSession(
+            self.primary, sync_session_class=RoutingSession, expire_on_commit=False
+        )
+        self.user_service = UserService(self.session)
+        self.token = current_user_id.set(42)
+
+    async def _create_database(self, name, email):
+        path = os.path.join(self.directory.name, name)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            session.add(
+                Users(email=email, password="x", first_name="Test", last_name="User")
+            )
+            await session.commit()
+        return engine
+
+    async def asyncTearDown(self):
+        current_user_id.reset(self.token)
+        await self.session.close()
+        await self.primary.dispose()
+        await self.replica.dispose()
+        await self.replica2.dispose()
+        self.directory.cleanup()
+
+    async def test_reads_go_to_replica(self):
+        user = await self.user_service.get(1)
+        self.assertEqual(user.email, "replica@example.com")
+
+    async def test_transaction_keeps_its_replica(self):
+        # Every read of a transaction, including the connection checkout,
+        # uses the same replica; the next transaction uses the next one.
+        self.assertEqual((await self.user_service.get(1)).email, "replica@example.com")
+        self.assertEqual(
+            [user.email for user in await self.user_service.fetch()],
+            ["replica@example.com"],
+        )
+        self.assertEqual(self.replica.sync_engine.pool.checkedout(), 1)
+        self.assertEqual(self.replica2.sync_engine.pool.checkedout(), 0)
+
+        await self.session.commit()
+        self.session.expunge_all()
+        self.assertEqual((await self.user_service.get(1)).email, "replica2@example.com")
+        self.assertEqual(self.replica.sync_engine.pool.checkedout(), 0)
+
+    async def test_reads_after_own_write_go_to_primary(self):
+        # The replica has not caught up, so the user's write is only visible
+        # on the primary during the stickiness window.
+        await self.user_service.bulk_soft_delete([1])
+        self.assertIsNone(await self.user_service.get(1))
+
+        current_user_id.set(7)
+        self.session.expunge_all()
+        self.assertEqual((await self.user_service.get(1)).email, "replica@example.com")
+
+    async def test_other_workers_see_the_write_through_shared_cache(self):
+        shared = Cache(MemoryCacheBackend(), 5, "recent-writes")
+        with patch.object(database, "get_recent_writes_cache", return_value=shared):
+            await self.user_service.bulk_soft_delete([1])
+            # Another worker has an empty in-process record.
+            database._recent_writers.clear()
+            self.session.expunge_all()
+            self.assertIsNone(await self.user_service.get(1))
+
+            current_user_id.set(7)
+            self.session.expunge_all()
+            user = await self.user_service.get(1)
+        self.assertEqual(user.email, "replica@example.com")
+        self.assertIsNotNone(await shared.get("42"))
+
+    async def test_reads_in_writing_transaction_go_to_primary(self):
+        await self.user_service.create(
+            Users(email="new@example.com", first_name="N", last_name="U"), commit=False
+        )
+        self.assertIsNotNone(await self.user_service.get_by_email("new@example.com"))
+        await self.session.rollback()
+        self.assertIsNone(await self.user_service.get_by_email("new@example.com"))
+
+
+if __name__ == "__main__":
+    unittest.main()
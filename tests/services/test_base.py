@@ -1,6 +1,9 @@
 import unittest
 from datetime import datetime
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.base import BaseModel
 from app.services.base import BaseService
 
@@ -10,55 +13,127 @@ class TestModel(BaseModel, table=True):
     name: str
 
 
-class TestBaseService(unittest.TestCase):
-    def setUp(self):
+class TestBaseService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
         # Create in-memory database for testing
-        self.engine = create_engine("sqlite:///:memory:")
-        SQLModel.metadata.create_all(self.engine)
-        self.session = Session(self.engine)
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        self.session = AsyncSession(self.engine)
         self.service = BaseService(self.session, TestModel)
 
-    def test_create(self):
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.engine.dispose()
+
+    async def test_create(self):
         model = TestModel(name="test item")
-        created = self.service.create(model)
+        created = await self.service.create(model)
         self.assertIsNotNone(created.id)
         self.assertEqual(created.name, "test item")
         self.assertIsInstance(created.created_at, datetime)
         self.assertIsNone(created.updated_at)
 
-    def test_get(self):
+    async def test_create_uses_single_statement(self):
+        statements = []
+        event.listen(
+            self.engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        created = await self.service.create(TestModel(name="test item"))
+        self.assertEqual(len(statements), 1)
+        self.assertIn("RETURNING", statements[0])
+        created.name = "updated item"
+        await self.service.update(created)
+        retrieved = await self.service.get(created.id)
+        self.assertEqual(retrieved.name, "updated item")
+
+    async def test_get(self):
         model = TestModel(name="test item")
-        created = self.service.create(model)
-        retrieved = self.service.get(created.id)
+        created = await self.service.create(model)
+        retrieved = await self.service.get(created.id)
         self.assertEqual(retrieved.name, "test item")
 
-    def test_update(self):
+    async def test_update(self):
         model = TestModel(name="test item")
-        created = self.service.create(model)
+        created = await self.service.create(model)
         created.name = "updated item"
-        updated = self.service.update(created)
+        updated = await self.service.update(created)
         self.assertEqual(updated.name, "updated item")
         self.assertIsNotNone(updated.updated_at)
 
-    def test_delete(self):
+    async def test_delete(self):
         model = TestModel(name="test item")
-        created = self.service.create(model)
-        self.service.delete(created)
-        retrieved = self.service.get(created.id)
+        created = await self.service.create(model)
+        await self.service.delete(created)
+        retrieved = await self.service.get(created.id)
         self.assertIsNone(retrieved)
 
-    def test_fetch(self):
+    async def test_fetch(self):
         for i in range(5):
-            self.service.create(TestModel(name=f"item {i}"))
-        items = self.service.fetch(limit=3)
+            await self.service.create(TestModel(name=f"item {i}"))
+        items = await self.service.fetch(limit=3)
         self.assertEqual(len(items), 3)
 
-    def test_count(self):
+    async def test_fetch_after(self):
         for i in range(5):
-            self.service.create(TestModel(name=f"item {i}"))
-        count = self.service.count()
+            await self.service.create(TestModel(name=f"item {i}"))
+        first_page = await self.service.fetch_after(limit=2)
+        second_page = await self.service.fetch_after(
+            after_id=first_page[-1].id, limit=2
+        )
+        self.assertEqual([item.name for item in first_page], ["item 0", "item 1"])
+        self.assertEqual([item.name for item in second_page], ["item 2", "item 3"])
+
+    async def test_count(self):
+        for i in range(5):
+            await self.service.create(TestModel(name=f"item {i}"))
+        count = await self.service.count()
         self.assertEqual(count, 5)
 
+    async def test_fetch_fields(self):
+        statements = []
+        event.listen(
+            self.engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        created = await self.service.bulk_create(
+            [TestModel(name=f"item {i}") for i in range(3)]
+        )
+        deleted_id, active_id = created[0].id, created[1].id
+        await self.service.delete(created[0])
+        statements.clear()
+        rows = await self.service.fetch_after(fields=["name"], limit=5)
+        self.assertEqual(
+            [row._asdict() for row in rows][0], {"id": 2, "name": "item 1"}
+        )
+        self.assertEqual(len(rows), 2)
+        self.assertNotIn("created_at", statements[-1])
+        row = await self.service.get(active_id, fields=["id"])
+        self.assertEqual(row._asdict(), {"id": active_id})
+        self.assertIsNone(await self.service.get(deleted_id, fields=["name"]))
+        with self.assertRaises(ValueError):
+            await self.service.fetch(fields=["missing"])
+
+    async def test_stream(self):
+        created = await self.service.bulk_create(
+            [TestModel(name=f"item {i}") for i in range(5)]
+        )
+        await self.service.delete(created[1])
+        batches = [
+            [item.name for item in batch]
+            async for batch in self.service.stream(batch_size=2)
+        ]
+        self.assertEqual(batches, [["item 0", "item 2"], ["item 3", "item 4"]])
+        filtered = [
+            item.name
+            async for batch in self.service.stream(TestModel.name != "item 0")
+            for item in batch
+        ]
+        self.assertEqual(filtered, ["item 2", "item 3", "item 4"])
+
 
 if __name__ == "__main__":
     unittest.main()
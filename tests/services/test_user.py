@@ -1,16 +1,23 @@
 import unittest
-from sqlmodel import Session, SQLModel, create_engine
+import unittest.mock
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.user import Users
 from app.services.user import UserService
+from app.utils.cache import Cache, LocalRedis, MemoryCacheBackend, RedisCacheBackend
 from app.utils.exception import ValidationError
+from app.utils.revocation import MemoryRevocationStore, RevocationList
 
 
-class TestUserService(unittest.TestCase):
-    def setUp(self):
+class TestUserService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
         # Create in-memory database for testing
-        self.engine = create_engine("sqlite:///:memory:")
-        SQLModel.metadata.create_all(self.engine)
-        self.session = Session(self.engine)
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        self.session = AsyncSession(self.engine)
         self.user_service = UserService(self.session)
 
         # self.clean_password = "testpass123"
@@ -23,8 +30,12 @@ class TestUserService(unittest.TestCase):
             phone_number="1234567890",
         )
 
-    def test_create_user(self):
-        created_user = self.user_service.create(self.sample_user.model_copy())
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.engine.dispose()
+
+    async def test_create_user(self):
+        created_user = await self.user_service.create(self.sample_user.model_copy())
         self.assertIsNotNone(created_user)
         self.assertEqual(created_user.email, self.sample_user.email)
         self.assertEqual(created_user.first_name, self.sample_user.first_name)
@@ -35,42 +46,285 @@ class TestUserService(unittest.TestCase):
         # password should be hashed
         self.assertTrue(created_user.password.startswith("scrypt:"))
 
-    def test_create_duplicate_user(self):
-        self.user_service.create(self.sample_user)
+    async def test_create_duplicate_user(self):
+        await self.user_service.create(self.sample_user)
+        duplicate = Users(
+            email=self.sample_user.email,
+            password="otherpass123",
+            first_name="Other",
+            last_name="User",
+        )
         with self.assertRaises(ValidationError):
-            self.user_service.create(self.sample_user)
+            await self.user_service.create(duplicate)
 
-    def test_get_by_email(self):
-        self.user_service.create(self.sample_user)
-        found_user = self.user_service.get_by_email(self.sample_user.email)
+    async def test_create_reraises_other_integrity_errors(self):
+        user = Users(email="test@example.com", password="testpass123", last_name="User")
+        with self.assertRaises(IntegrityError):
+            await self.user_service.create(user)
+
+    async def test_create_reraises_null_email(self):
+        user = Users(password="testpass123", first_name="Test", last_name="User")
+        with self.assertRaises(IntegrityError) as context:
+            await self.user_service.create(user)
+        self.assertIn("NOT NULL constraint failed: users.email", str(context.exception))
+
+    async def test_get_by_email(self):
+        await self.user_service.create(self.sample_user)
+        found_user = await self.user_service.get_by_email(self.sample_user.email)
         self.assertIsNotNone(found_user)
         self.assertEqual(found_user.email, self.sample_user.email)
 
-    def test_login_success(self):
+    async def test_login_success(self):
         pwd = self.sample_user.password
-        created_user = self.user_service.create(self.sample_user)
-        logged_in_user = self.user_service.login(created_user.email, pwd)
+        created_user = await self.user_service.create(self.sample_user)
+        logged_in_user = await self.user_service.login(created_user.email, pwd)
         self.assertIsNotNone(logged_in_user)
         self.assertEqual(logged_in_user.email, self.sample_user.email)
 
-    def test_login_failure_wrong_password(self):
-        self.user_service.create(self.sample_user.model_copy())
-        logged_in_user = self.user_service.login(
+    async def test_login_failure_wrong_password(self):
+        await self.user_service.create(self.sample_user.model_copy())
+        logged_in_user = await self.user_service.login(
             self.sample_user.email, "wrongpassword"
         )
         self.assertIsNone(logged_in_user)
 
-    def test_login_failure_wrong_email(self):
-        logged_in_user = self.user_service.login(
+    async def test_login_failure_wrong_email(self):
+        logged_in_user = await self.user_service.login(
             "nonexistent@example.com", "anypassword"
         )
         self.assertIsNone(logged_in_user)
 
-    def test_delete_user(self):
-        created_user = self.user_service.create(self.sample_user.model_copy())
-        self.user_service.delete(created_user)
-        self.assertNotEqual(created_user.email, self.sample_user.email)
-        self.assertIn("-deleted-", created_user.email)
+    def _new_sample_user(self):
+        return Users(**self.sample_user.model_dump())
+
+    async def test_delete_user(self):
+        created_user = await self.user_service.create(self._new_sample_user())
+        await self.user_service.delete(created_user)
+        self.assertEqual(created_user.email, self.sample_user.email)
+        self.assertIsNone(await self.user_service.get_by_email(created_user.email))
+
+    async def test_recreate_deleted_user(self):
+        created_user = await self.user_service.create(self._new_sample_user())
+        deleted_id = created_user.id
+        await self.user_service.delete(created_user)
+        recreated_user = await self.user_service.create(self._new_sample_user())
+        self.assertNotEqual(recreated_user.id, deleted_id)
+
+    def _sample_users(self, count):
+        return [
+            Users(**{**self.sample_user.model_dump(), "email": f"user{i}@example.com"})
+            for i in range(count)
+        ]
+
+    async def test_bulk_create_users(self):
+        await self.user_service.create(self._new_sample_user())
+        models = self._sample_users(3)
+        models.insert(1, self._new_sample_user())
+        models.append(self._sample_users(1)[0])
+        results = await self.user_service.bulk_create(models)
+
+        self.assertEqual(len(results), 5)
+        self.assertIsInstance(results[1], ValidationError)
+        self.assertIsInstance(results[4], ValidationError)
+        created = [result for result in results if isinstance(result, Users)]
+        self.assertEqual(len(created), 3)
+        self.assertTrue(all(user.password.startswith("scrypt:") for user in created))
+        self.assertEqual(await self.user_service.count(), 4)
+
+    async def test_bulk_create_retries_concurrent_duplicate(self):
+        other_session = AsyncSession(self.engine)
+        self.addAsyncCleanup(other_session.close)
+        taken_emails = self.user_service._taken_emails
+        calls = []
+
+        async def taken_before_concurrent_signup(emails):
+            taken = await taken_emails(emails)
+            if not calls:
+                # Another request registers the first email after the check.
+                await UserService(other_session).create(self._sample_users(1)[0])
+            calls.append(emails)
+            return taken
+
+        with unittest.mock.patch.object(
+            self.user_service, "_taken_emails", taken_before_concurrent_signup
+        ):
+            results = await self.user_service.bulk_create(self._sample_users(3))
+        self.assertEqual(len(calls), 2)
+        self.assertIsInstance(results[0], ValidationError)
+        self.assertEqual(results[0].message, "User with this email already exists.")
+        self.assertEqual(
+            [user.email for user in results[1:]],
+            [
+                "user1@example.com",
+                "user2@example.com",
+            ],
+        )
+
+    async def test_bulk_update_users(self):
+        created = await self.user_service.bulk_create(self._sample_users(2))
+        for user in created:
+            user.first_name = "Updated"
+        await self.user_service.bulk_update(created)
+        found = await self.user_service.get_by_email("user1@example.com")
+        self.assertEqual(found.first_name, "Updated")
+
+    async def test_bulk_update_duplicate_email(self):
+        created = await self.user_service.bulk_create(self._sample_users(2))
+        created[1].email = created[0].email
+        with self.assertRaises(ValidationError):
+            await self.user_service.bulk_update(created)
+
+    async def test_bulk_soft_delete_users(self):
+        created = await self.user_service.bulk_create(self._sample_users(2))
+        ids = [user.id for user in created]
+        deleted = await self.user_service.bulk_soft_delete(ids + [ids[0], 999])
+        self.assertEqual(sorted(deleted), sorted(ids))
+        self.assertEqual(await self.user_service.fetch(Users.id.in_(ids)), [])
+
+    async def test_bulk_soft_delete_marks_stale_once_per_chunk(self):
+        created = await self.user_service.bulk_create(self._sample_users(3))
+        store = MemoryRevocationStore()
+        self.user_service.bulk_chunk_size = 2
+        with unittest.mock.patch(
+            "app.security.get_revocation_list",
+            return_value=RevocationList(store),
+        ), unittest.mock.patch.object(store, "add_many", wraps=store.add_many) as add:
+            await self.user_service.bulk_soft_delete([user.id for user in created])
+        self.assertEqual([len(call.args[0]) for call in add.call_args_list], [2, 1])
+
+    async def test_get_by_email_uses_partial_index(self):
+        query = self.user_service.where(Users.email == self.sample_user.email)
+        plan = " ".join(await self.user_service.explain(query))
+        self.assertIn("ix_users_email_active", plan)
+
+    async def test_fetch_after_uses_soft_delete_index(self):
+        query = self.user_service.where(Users.id > 0).order_by(Users.id).limit(10)
+        plan = " ".join(await self.user_service.explain(query))
+        self.assertIn("ix_users_is_deleted_id", plan)
+
+
+class TestUserServiceCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        self.cache = Cache(MemoryCacheBackend(), name="users")
+        self.sessions = []
+        user = Users(
+            email="cached@example.com",
+            password="testpass123",
+            first_name="Cached",
+            last_name="User",
+        )
+        self.user_id = (await self._service().create(user)).id
+
+    async def asyncTearDown(self):
+        for session in self.sessions:
+            await session.close()
+        await self.engine.dispose()
+
+    def _service(self) -> UserService:
+        # A new session per call, like one request each.
+        session = AsyncSession(self.engine, expire_on_commit=False)
+        self.sessions.append(session)
+        service = UserService(session)
+        service.cache = self.cache
+        return service
+
+    async def test_get_reads_through_cache(self):
+        first = await self._service().get(self.user_id)
+        service = self._service()
+        with unittest.mock.patch.object(service, "_read") as read:
+            cached = await service.get(self.user_id)
+        read.assert_not_called()
+        self.assertEqual(cached.email, first.email)
+        self.assertEqual(cached.created_at, first.created_at)
+        self.assertEqual(self.cache.hits, 1)
+
+        # The cached row is attached to the session and can be updated.
+        cached.first_name = "Renamed"
+        await service.update(cached)
+        found = await self._service().get(self.user_id)
+        self.assertEqual(found.first_name, "Renamed")
+
+    async def test_get_reads_through_redis_cache(self):
+        self.cache = Cache(RedisCacheBackend(LocalRedis()), name="users")
+        first = await self._service().get(self.user_id)
+        cached = await self._service().get(self.user_id)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(cached.created_at, first.created_at)
+        self.assertIsNone(cached.phone_number)
+
+    async def test_get_by_email_reads_through_cache(self):
+        await self._service().get_by_email("cached@example.com")
+        service = self._service()
+        with unittest.mock.patch.object(service, "_read") as read:
+            user = await service.get_by_email("cached@example.com")
+        read.assert_not_called()
+        self.assertEqual(user.id, self.user_id)
+
+    async def test_email_change_invalidates_old_email(self):
+        service = self._service()
+        user = await service.get_by_email("cached@example.com")
+        user.email = "changed@example.com"
+        await service.update(user)
+        self.assertIsNone(await self._service().get_by_email("cached@example.com"))
+        changed = await self._service().get_by_email("changed@example.com")
+        self.assertEqual(changed.id, self.user_id)
+
+    async def test_delete_invalidates(self):
+        await self._service().get_by_email("cached@example.com")
+        await self._service().delete_by_id(self.user_id)
+        self.assertIsNone(await self._service().get(self.user_id))
+        self.assertIsNone(await self._service().get_by_email("cached@example.com"))
+
+    async def test_bulk_soft_delete_invalidates(self):
+        await self._service().get(self.user_id)
+        await self._service().bulk_soft_delete([self.user_id])
+        self.assertIsNone(await self._service().get(self.user_id))
+
+    async def test_create_after_delete_invalidates_email(self):
+        await self._service().get_by_email("cached@example.com")
+        await self._service().delete_by_id(self.user_id)
+        user = Users(
+            email="cached@example.com",
+            password="testpass123",
+            first_name="New",
+            last_name="User",
+        )
+        created = await self._service().create(user)
+        found = await self._service().get_by_email("cached@example.com")
+        self.assertEqual(found.id, created.id)
+
+    async def test_concurrent_delete_is_not_undone(self):
+        # The reader fetches the row, then a delete commits and invalidates
+        # before the reader caches what it read.
+        reader = self._service()
+        read = reader._read
+
+        async def read_then_delete(statement):
+            result = await read(statement)
+            rows = result.all()
+            await self._service().delete_by_id(self.user_id)
+            return unittest.mock.Mock(first=lambda: rows[0] if rows else None)
+
+        with unittest.mock.patch.object(reader, "_read", read_then_delete):
+            await reader.get(self.user_id)
+        self.assertIsNone(await self._service().get(self.user_id))
+
+    async def test_uncommitted_update_invalidates_on_commit(self):
+        await self._service().get_by_email("cached@example.com")
+        service = self._service()
+        user = await service.get(self.user_id)
+        user.email = "pending@example.com"
+        await service.update(user, commit=False)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertIsNotNone(await self.cache.get(str(self.user_id)))
+
+        await service._commit()
+        self.assertIsNone(await self.cache.get(str(self.user_id)))
+        found = await self._service().get(self.user_id)
+        self.assertEqual(found.email, "pending@example.com")
 
 
 if __name__ == "__main__":
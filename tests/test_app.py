@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestImport(unittest.TestCase):
+    def test_import_reads_no_settings(self):
+        # Without any environment variables or .env file, the settings would
+        # fail to validate, so importing run must not read them.
+        script = (
+            "import run\n"
+            "from app.config import get_settings\n"
+            "assert get_settings.cache_info().misses == 0\n"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=directory,
+                env={"PATH": os.environ.get("PATH", ""), "PYTHONPATH": ROOT},
+                capture_output=True,
+                text=True,
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
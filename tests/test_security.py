@@ -1,6 +1,12 @@
+import os
+import tempfile
+import time
 import unittest
 from unittest.mock import patch, AsyncMock
 from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 import jwt
 
 from app.security import (
@@ -14,9 +20,23 @@ from app.security import (
     _get_user_id_from_token,
     set_current_user_id,
     get_current_user_id,
+    get_current_claims,
+    ClaimsCache,
+    revoke_token,
+    rotate_refresh_token,
+    mark_subject_stale,
+    is_subject_stale,
+    verify_refresh_claims,
 )
 from app.models.user import Users
 from app.config import jwt_settings
+from app.routes.auth import refresh
+from app.services.user import UserService
+from app.utils.revocation import (
+    MemoryRevocationStore,
+    RevocationList,
+    SqliteRevocationStore,
+)
 
 
 class TestSecurity(unittest.IsolatedAsyncioTestCase):
@@ -34,6 +54,24 @@ class TestSecurity(unittest.IsolatedAsyncioTestCase):
         with self.assertRaises(HTTPException):
             await _get_jwt_payload(token)
 
+    @patch("app.security.jwt.decode")
+    async def test_get_jwt_payload_decodes_once_per_context(self, mock_decode):
+        mock_decode.return_value = {"sub": "1", "type": "access"}
+        token = "valid.token.here"
+        await set_current_user_id(token)
+        credentials = AsyncMock(credentials=token)
+        sub = await verify_access_token(credentials)
+        self.assertEqual(sub, "1")
+        self.assertEqual(get_current_claims(), {"sub": "1", "type": "access"})
+        mock_decode.assert_called_once()
+
+    @patch("app.security.jwt.decode")
+    async def test_get_jwt_payload_decodes_other_token(self, mock_decode):
+        mock_decode.return_value = {"sub": "1", "type": "access"}
+        await _get_jwt_payload("first.token.here")
+        await _get_jwt_payload("second.token.here")
+        self.assertEqual(mock_decode.call_count, 2)
+
     @patch("app.security._get_jwt_payload", new_callable=AsyncMock)
     async def test_verify_token_type_valid(self, mock_get_jwt_payload):
         mock_get_jwt_payload.return_value = {"sub": "1", "type": "access"}
@@ -48,6 +86,21 @@ class TestSecurity(unittest.IsolatedAsyncioTestCase):
         with self.assertRaises(HTTPException):
             await _verify_token_type(credentials, "access")
 
+    @patch("app.security._get_jwt_payload", new_callable=AsyncMock)
+    async def test_verify_token_type_revoked(self, mock_get_jwt_payload):
+        payload = {
+            "sub": "1",
+            "type": "access",
+            "jti": "revoked",
+            "exp": time.time() + 60,
+        }
+        mock_get_jwt_payload.return_value = payload
+        await revoke_token(payload)
+        credentials = AsyncMock(credentials="valid.token.here")
+        with self.assertRaises(HTTPException) as context:
+            await _verify_token_type(credentials, "access")
+        self.assertEqual(context.exception.status_code, 401)
+
     @patch("app.security._verify_token_type", new_callable=AsyncMock)
     async def test_verify_access_token(self, mock_verify_token_type):
         mock_verify_token_type.return_value = "1"
@@ -72,6 +125,7 @@ class TestSecurity(unittest.IsolatedAsyncioTestCase):
         )
         self.assertEqual(payload["sub"], "1")
         self.assertEqual(payload["type"], "access")
+        self.assertIn("jti", payload)
 
     def test_create_jwt_token_refresh(self):
         user = Users(id=1, email="test@example.com")
@@ -120,5 +174,139 @@ class TestSecurity(unittest.IsolatedAsyncioTestCase):
         self.assertIsNone(get_current_user_id())
 
 
+class TestRefreshTokenRotation(unittest.IsolatedAsyncioTestCase):
+
+    def _decode(self, token):
+        return jwt.decode(
+            token,
+            jwt_settings.authjwt_secret_key,
+            algorithms=[jwt_settings.authjwt_algorithm],
+        )
+
+    async def test_rotation_keeps_family_and_revokes_old_token(self):
+        user = Users(id=1, email="test@example.com")
+        refresh_token = _create_jwt_token(user, "refresh")
+        claims = await verify_refresh_claims(AsyncMock(credentials=refresh_token))
+
+        access_token, new_refresh_token = await rotate_refresh_token(claims)
+        self.assertEqual(self._decode(access_token)["email"], "test@example.com")
+        new_claims = self._decode(new_refresh_token)
+        self.assertEqual(new_claims["fam"], claims["fam"])
+        self.assertNotEqual(new_claims["jti"], claims["jti"])
+
+        with self.assertRaises(HTTPException):
+            await verify_refresh_claims(AsyncMock(credentials=refresh_token))
+
+    async def test_reuse_revokes_family(self):
+        user = Users(id=2, email="test@example.com")
+        refresh_token = _create_jwt_token(user, "refresh")
+        claims = await verify_refresh_claims(AsyncMock(credentials=refresh_token))
+        _, new_refresh_token = await rotate_refresh_token(claims)
+
+        with self.assertRaises(HTTPException):
+            await verify_refresh_claims(AsyncMock(credentials=refresh_token))
+        with self.assertRaises(HTTPException):
+            await verify_refresh_claims(AsyncMock(credentials=new_refresh_token))
+
+    def _use_revocation_list(self, revocation_list):
+        patcher = patch(
+            "app.security.get_revocation_list", return_value=revocation_list
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_subject_stale(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = SqliteRevocationStore(os.path.join(directory.name, "revoked.db"))
+        self._use_revocation_list(RevocationList(store))
+
+        user = Users(id=3, email="test@example.com")
+        claims = self._decode(_create_jwt_token(user, "refresh"))
+        self.assertFalse(is_subject_stale(claims))
+        await mark_subject_stale(3)
+        self.assertTrue(is_subject_stale(claims))
+
+    async def test_subject_always_stale_without_durable_store(self):
+        self._use_revocation_list(RevocationList(MemoryRevocationStore()))
+        user = Users(id=4, email="test@example.com")
+        claims = self._decode(_create_jwt_token(user, "refresh"))
+        self.assertTrue(is_subject_stale(claims))
+
+    async def test_deleted_user_cannot_refresh_after_restart(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        session = AsyncSession(engine, expire_on_commit=False)
+        self.addAsyncCleanup(engine.dispose)
+        self.addAsyncCleanup(session.close)
+
+        service = UserService(session)
+        user = await service.create(
+            Users(
+                email="deleted@example.com",
+                password="testpass123",
+                first_name="Deleted",
+                last_name="User",
+            )
+        )
+        claims = self._decode(_create_jwt_token(user, "refresh"))
+        await service.delete(user)
+
+        # A restarted process, or another worker, starts with an empty list.
+        self._use_revocation_list(RevocationList(MemoryRevocationStore()))
+        rotation = jwt_settings.model_copy(update={"refresh_token_rotation": True})
+        with patch("app.routes.auth.get_jwt_settings", return_value=rotation):
+            with self.assertRaises(HTTPException) as context:
+                await refresh(session, claims)
+        self.assertEqual(context.exception.status_code, 401)
+
+
+class TestClaimsCache(unittest.IsolatedAsyncioTestCase):
+
+    def test_get_and_set(self):
+        cache = ClaimsCache(max_size=10, ttl_seconds=60)
+        self.assertIsNone(cache.get("token"))
+        cache.set("token", {"sub": "1", "exp": time.time() + 60})
+        self.assertEqual(cache.get("token")["sub"], "1")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_expires_at_token_exp(self):
+        cache = ClaimsCache(max_size=10, ttl_seconds=60)
+        cache.set("token", {"sub": "1", "exp": time.time() - 1})
+        self.assertIsNone(cache.get("token"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = ClaimsCache(max_size=2, ttl_seconds=60)
+        cache.set("first", {"sub": "1"})
+        cache.set("second", {"sub": "2"})
+        cache.get("first")
+        cache.set("third", {"sub": "3"})
+        self.assertIsNone(cache.get("second"))
+        self.assertIsNotNone(cache.get("first"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_invalidate(self):
+        cache = ClaimsCache(max_size=10, ttl_seconds=60)
+        cache.set("token", {"sub": "1"})
+        cache.invalidate("token")
+        self.assertIsNone(cache.get("token"))
+
+    @patch("app.security.jwt.decode")
+    async def test_get_jwt_payload_uses_cache(self, mock_decode):
+        mock_decode.return_value = {"sub": "1", "type": "access"}
+        cache = ClaimsCache(max_size=10, ttl_seconds=60)
+        with patch("app.security.get_claims_cache", return_value=cache):
+            await _get_jwt_payload("valid.token.here")
+            self.assertEqual(cache.stats()["size"], 1)
+        cache.set("other.token.here", {"sub": "2", "type": "access"})
+        with patch("app.security.get_claims_cache", return_value=cache):
+            payload = await _get_jwt_payload("other.token.here")
+        self.assertEqual(payload["sub"], "2")
+        mock_decode.assert_called_once()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from app import server
+from app.config import get_settings
+from app.models import database
+
+
+def cgroup_files(files):
+    return patch.object(server, "_read", side_effect=files.get)
+
+
+class TestWorkerCount(unittest.TestCase):
+    def test_cgroup_v2_quota(self):
+        with cgroup_files({server.CGROUP_V2_CPU_MAX: "150000 100000"}):
+            self.assertEqual(server.cpu_quota(), 1.5)
+
+    def test_cgroup_v2_without_limit(self):
+        with cgroup_files({server.CGROUP_V2_CPU_MAX: "max 100000"}):
+            self.assertIsNone(server.cpu_quota())
+
+    def test_cgroup_v1_quota(self):
+        files = {server.CGROUP_V1_QUOTA: "200000", server.CGROUP_V1_PERIOD: "100000"}
+        with cgroup_files(files):
+            self.assertEqual(server.cpu_quota(), 2)
+        files[server.CGROUP_V1_QUOTA] = "-1"
+        with cgroup_files(files):
+            self.assertIsNone(server.cpu_quota())
+
+    def test_default_workers_rounds_quota_up_within_cpus(self):
+        with patch.object(server, "available_cpus", return_value=8):
+            with patch.object(server, "cpu_quota", return_value=2.5):
+                self.assertEqual(server.default_workers(), 3)
+            with patch.object(server, "cpu_quota", return_value=None):
+                self.assertEqual(server.default_workers(), 8)
+        with patch.object(server, "available_cpus", return_value=2):
+            with patch.object(server, "cpu_quota", return_value=0.5):
+                self.assertEqual(server.default_workers(), 1)
+            with patch.object(server, "cpu_quota", return_value=16):
+                self.assertEqual(server.default_workers(), 2)
+
+
+class TestShareWorkerState(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _settings(self, **update):
+        values = {
+            "jwt_revocation_db": "",
+            "metrics_dir": self.directory.name,
+            "database_replica_urls": [],
+            "cache_backend": "",
+        }
+        return get_settings().model_copy(update={**values, **update})
+
+    def test_shared_defaults(self):
+        stale = os.path.join(self.directory.name, "worker-1.json")
+        open(stale, "w").close()
+        self.assertEqual(server.share_worker_state(self._settings()), [])
+        self.assertEqual(os.environ["JWT_REVOCATION_DB"], server.DEFAULT_REVOCATION_DB)
+        self.assertEqual(os.environ["METRICS_DIR"], self.directory.name)
+        self.assertEqual(os.environ["LOG_FILE"], "")
+        self.assertFalse(os.path.exists(stale))
+
+    def test_keeps_per_worker_log_file(self):
+        settings = self._settings(log_file="./logs/app-{pid}.log")
+        self.assertEqual(server.share_worker_state(settings), [])
+        self.assertNotIn("LOG_FILE", os.environ)
+
+    def test_rejects_unshareable_settings(self):
+        settings = self._settings(
+            log_file="./logs/app.log", database_replica_urls=["sqlite://"]
+        )
+        self.assertEqual(len(server.share_worker_state(settings)), 2)
+        self.assertNotIn("JWT_REVOCATION_DB", os.environ)
+
+    def test_replicas_with_shared_cache(self):
+        settings = self._settings(
+            database_replica_urls=["sqlite://"],
+            cache_backend="redis",
+            cache_redis_url="redis://localhost:6379/0",
+        )
+        self.assertEqual(server.share_worker_state(settings), [])
+
+
+class TestForkSafety(unittest.TestCase):
+    def test_child_creates_new_engine(self):
+        inherited = database.get_engine()
+        database._forget_engines_after_fork()
+        self.assertIsNone(database.engine)
+        self.assertIsNot(database.get_engine(), inherited)
+
+
+if __name__ == "__main__":
+    unittest.main()
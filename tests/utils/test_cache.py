@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+from app.utils.cache import (
+    Cache,
+    LocalRedis,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+)
+
+
+class TestMemoryCacheBackend(unittest.IsolatedAsyncioTestCase):
+    async def test_evicts_least_recently_used(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        await backend.set("a", {"id": 1}, ttl=60)
+        await backend.set("b", {"id": 2}, ttl=60)
+        await backend.get("a")
+        await backend.set("c", {"id": 3}, ttl=60)
+        self.assertEqual(await backend.get("a"), {"id": 1})
+        self.assertIsNone(await backend.get("b"))
+        self.assertEqual(len(backend), 2)
+
+    async def test_expires_entries(self):
+        backend = MemoryCacheBackend()
+        with patch("app.utils.cache.time.monotonic", return_value=100.0):
+            await backend.set("a", {"id": 1}, ttl=5)
+        with patch("app.utils.cache.time.monotonic", return_value=104.0):
+            self.assertEqual(await backend.get("a"), {"id": 1})
+        with patch("app.utils.cache.time.monotonic", return_value=105.0):
+            self.assertIsNone(await backend.get("a"))
+        self.assertEqual(len(backend), 0)
+
+
+class TestRedisCacheBackend(unittest.IsolatedAsyncioTestCase):
+    async def test_round_trips_json(self):
+        client = LocalRedis()
+        backend = RedisCacheBackend(client)
+        await backend.set("a", {"id": 1, "email": "a@example.com"}, ttl=60)
+        self.assertIsInstance(await client.get("a"), bytes)
+        self.assertEqual(await backend.get("a"), {"id": 1, "email": "a@example.com"})
+        await backend.delete("a")
+        self.assertIsNone(await backend.get("a"))
+        self.assertEqual(await client.dbsize(), 0)
+
+
+class TestCache(unittest.IsolatedAsyncioTestCase):
+    async def test_namespaces_keys_and_counts_hits(self):
+        backend = MemoryCacheBackend()
+        users = Cache(backend, name="users")
+        posts = Cache(backend, name="posts")
+        await users.set("1", {"id": 1})
+        self.assertIsNone(await posts.get("1"))
+        self.assertEqual(await users.get("1"), {"id": 1})
+        await users.delete("1")
+        self.assertIsNone(await users.get("1"))
+        stats = users.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    async def test_tombstone_blocks_add(self):
+        for backend in (MemoryCacheBackend(), RedisCacheBackend(LocalRedis())):
+            with self.subTest(backend=type(backend).__name__):
+                cache = Cache(backend, name="users")
+                self.assertTrue(await cache.add("1", {"id": 1}))
+                self.assertFalse(await cache.add("1", {"id": 2}))
+                await cache.invalidate("1")
+                self.assertIsNone(await cache.get("1"))
+                self.assertFalse(await cache.add("1", {"id": 1}))
+                await cache.delete("1")
+                self.assertTrue(await cache.add("1", {"id": 3}))
+                self.assertEqual(await cache.get("1"), {"id": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
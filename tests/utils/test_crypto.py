@@ -0,0 +1,40 @@
+import asyncio
+import time
+import unittest
+
+from app.utils.crypto import (
+    PasswordHashPool,
+    hash_password_async,
+    verify_password_async,
+)
+from app.utils.exception import ServiceUnavailableError
+
+
+class TestPasswordHashPool(unittest.IsolatedAsyncioTestCase):
+    async def test_hash_and_verify_async(self):
+        hashed = await hash_password_async("testpass123")
+        self.assertTrue(hashed.startswith("scrypt:"))
+        self.assertTrue(await verify_password_async("testpass123", hashed))
+        self.assertFalse(await verify_password_async("wrongpassword", hashed))
+
+    async def test_saturated_pool_rejects(self):
+        pool = PasswordHashPool("thread", max_workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        slow = asyncio.create_task(pool.run(time.sleep, 0.2))
+        await asyncio.sleep(0)
+        with self.assertRaises(ServiceUnavailableError):
+            await pool.run(time.sleep, 0)
+        await slow
+        stats = pool.stats()
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["pending"], 0)
+        self.assertGreater(stats["max_seconds"], 0)
+
+    def test_invalid_executor_type(self):
+        with self.assertRaises(ValueError):
+            PasswordHashPool("fiber", max_workers=1, max_pending=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
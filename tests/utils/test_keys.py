@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from app.utils.keys import KeyRing
+
+
+def _write_private_key(directory, kid, private_key, mtime):
+    path = os.path.join(directory, f"{kid}.pem")
+    with open(path, "wb") as key_file:
+        key_file.write(
+            private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestKeyRing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.keys_dir = self.tmp.name
+
+    def _sign_and_verify(self, key_ring):
+        kid, key, algorithm = key_ring.signing_key()
+        token = jwt.encode({"sub": "1"}, key, algorithm=algorithm, headers={"kid": kid})
+        public_key, algorithm = key_ring.verification_key(token)
+        return kid, jwt.decode(token, public_key, algorithms=[algorithm])
+
+    def test_hmac_uses_secret(self):
+        key_ring = KeyRing("HS256", "secret")
+        self.assertEqual(key_ring.signing_key(), (None, "secret", "HS256"))
+        self.assertEqual(key_ring.jwks(), {"keys": []})
+
+    def test_asymmetric_requires_keys_dir(self):
+        with self.assertRaises(ValueError):
+            KeyRing("RS256", "secret")
+
+    def test_sign_and_verify_key_types(self):
+        cases = [
+            (
+                "rsa",
+                rsa.generate_private_key(public_exponent=65537, key_size=2048),
+                "RS256",
+            ),
+            ("ec", ec.generate_private_key(ec.SECP256R1()), "ES256"),
+            ("ed", ed25519.Ed25519PrivateKey.generate(), "EdDSA"),
+        ]
+        for kid, private_key, algorithm in cases:
+            with self.subTest(kid=kid):
+                for name in os.listdir(self.keys_dir):
+                    os.remove(os.path.join(self.keys_dir, name))
+                _write_private_key(self.keys_dir, kid, private_key, 1000)
+                key_ring = KeyRing("RS256", "secret", keys_dir=self.keys_dir)
+                signed_kid, payload = self._sign_and_verify(key_ring)
+                self.assertEqual(signed_kid, kid)
+                self.assertEqual(payload["sub"], "1")
+                self.assertEqual(key_ring.jwks()["keys"][0]["alg"], algorithm)
+
+    def test_rotation_keeps_old_keys_verifiable(self):
+        _write_private_key(
+            self.keys_dir, "old", ed25519.Ed25519PrivateKey.generate(), 1000
+        )
+        key_ring = KeyRing("EdDSA", "secret", keys_dir=self.keys_dir, refresh_seconds=0)
+        kid, key, algorithm = key_ring.signing_key()
+        old_token = jwt.encode(
+            {"sub": "1"}, key, algorithm=algorithm, headers={"kid": kid}
+        )
+
+        _write_private_key(
+            self.keys_dir, "new", ed25519.Ed25519PrivateKey.generate(), 2000
+        )
+        self.assertEqual(key_ring.signing_key()[0], "new")
+        public_key, algorithm = key_ring.verification_key(old_token)
+        self.assertEqual(
+            jwt.decode(old_token, public_key, algorithms=[algorithm])["sub"], "1"
+        )
+        self.assertEqual(
+            {key["kid"] for key in key_ring.jwks()["keys"]}, {"old", "new"}
+        )
+
+    def test_unknown_kid_rejected(self):
+        _write_private_key(
+            self.keys_dir, "current", ed25519.Ed25519PrivateKey.generate(), 1000
+        )
+        key_ring = KeyRing("EdDSA", "secret", keys_dir=self.keys_dir)
+        other = ed25519.Ed25519PrivateKey.generate()
+        token = jwt.encode(
+            {"sub": "1"}, other, algorithm="EdDSA", headers={"kid": "gone"}
+        )
+        with self.assertRaises(jwt.PyJWTError):
+            key_ring.verification_key(token)
+
+    def test_failed_reload_keeps_current_keys(self):
+        path = _write_private_key(
+            self.keys_dir, "current", ed25519.Ed25519PrivateKey.generate(), 1000
+        )
+        key_ring = KeyRing("EdDSA", "secret", keys_dir=self.keys_dir, refresh_seconds=0)
+        kid, key, algorithm = key_ring.signing_key()
+        token = jwt.encode({"sub": "1"}, key, algorithm=algorithm, headers={"kid": kid})
+
+        # No signing key left, then an unreadable directory.
+        with open(path, "wb") as key_file:
+            key_file.write(b"not a key")
+        self.assertEqual(key_ring.signing_key()[0], "current")
+        self.tmp.cleanup()
+        self.assertEqual(key_ring.signing_key()[0], "current")
+        public_key, algorithm = key_ring.verification_key(token)
+        self.assertEqual(
+            jwt.decode(token, public_key, algorithms=[algorithm])["sub"], "1"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import json
+import queue
+import logging
+import unittest
+from app.utils.logger import (
+    BatchStreamHandler,
+    BatchingQueueListener,
+    BoundedQueueHandler,
+    CorrelationIDFilter,
+    JSONFormatter,
+    set_correlation_id,
+)
+
+
+class TestQueueLogging(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger(f"test.{self.id()}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addFilter(CorrelationIDFilter())
+
+    def tearDown(self):
+        self.logger.handlers.clear()
+
+    def test_drop_policy_counts_and_reports_dropped_records(self):
+        log_queue = queue.Queue(maxsize=2)
+        handler = BoundedQueueHandler(log_queue, policy="drop")
+        self.logger.addHandler(handler)
+        for i in range(4):
+            self.logger.info("message %d", i)
+        self.assertEqual(handler.dropped, 2)
+
+        log_queue.get_nowait()
+        log_queue.get_nowait()
+        self.logger.info("after")
+        messages = [log_queue.get_nowait().getMessage() for _ in range(2)]
+        self.assertEqual(messages[0], "Dropped 2 log record(s), queue full")
+        self.assertEqual(messages[1], "after")
+
+    def test_prepare_freezes_message_arguments(self):
+        log_queue = queue.Queue()
+        self.logger.addHandler(BoundedQueueHandler(log_queue))
+        values = ["before"]
+        self.logger.info("value %s", values)
+        values.append("after")
+        record = log_queue.get_nowait()
+        self.assertEqual(record.getMessage(), "value ['before']")
+        self.assertIsNone(record.args)
+
+    def test_listener_writes_json_lines_with_correlation_id(self):
+        log_queue = queue.Queue()
+        stream = io.StringIO()
+        output = BatchStreamHandler(stream)
+        output.setFormatter(JSONFormatter())
+        listener = BatchingQueueListener(log_queue, output, batch_size=2)
+        self.logger.addHandler(BoundedQueueHandler(log_queue))
+
+        listener.start()
+        set_correlation_id("abc-123")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("failed")
+        self.logger.info("done")
+        listener.stop()
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([line["message"] for line in lines], ["failed", "done"])
+        self.assertEqual(lines[0]["correlation_id"], "abc-123")
+        self.assertIn("ValueError: boom", lines[0]["exception"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import asyncio
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from app.utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.counter("requests_total", "Requests.", ("route",))
+        self.latency = self.registry.histogram(
+            "latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)
+        )
+
+    def test_render_counter_and_histogram(self):
+        self.requests.inc("/a")
+        self.requests.inc("/a")
+        self.latency.observe(0.05, "/a")
+        self.latency.observe(0.1, "/a")
+        self.latency.observe(5, "/a")
+        lines = self.registry.render().splitlines()
+
+        self.assertIn("# TYPE requests_total counter", lines)
+        self.assertIn('requests_total{route="/a"} 2.0', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1.0"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_count{route="/a"} 3', lines)
+
+    def test_render_sums_worker_snapshots(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            self.registry.metrics_dir = metrics_dir
+            other = MetricsRegistry()
+            other.counter("requests_total", "Requests.", ("route",)).inc("/a", amount=3)
+            with open(os.path.join(metrics_dir, "worker-1.json"), "w") as f:
+                json.dump(other.snapshot(), f)
+
+            self.requests.inc("/a")
+            self.requests.inc("/b")
+            lines = self.registry.render().splitlines()
+
+        self.assertIn('requests_total{route="/a"} 4.0', lines)
+        self.assertIn('requests_total{route="/b"} 1.0', lines)
+
+    def test_label_values_are_escaped(self):
+        self.requests.inc('/a"b')
+        self.assertIn('requests_total{route="/a\\"b"} 1.0', self.registry.render())
+
+
+class TestMaybeFlush(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.registry = MetricsRegistry(self.directory.name, flush_seconds=0)
+
+    async def test_logs_failed_flush(self):
+        self.registry.metrics_dir = os.path.join(self.directory.name, "file")
+        open(self.registry.metrics_dir, "w").close()
+        with mock.patch("app.utils.metrics.log_warning") as log_warning:
+            self.registry.maybe_flush()
+            await asyncio.sleep(0.1)
+        log_warning.assert_called_once()
+        self.assertIn("flush failed", log_warning.call_args.args[0])
+
+    async def test_skips_flush_while_one_is_running(self):
+        release = threading.Event()
+        writes = []
+
+        def write_snapshot(snapshot):
+            writes.append(snapshot)
+            release.wait(1)
+
+        self.registry.write_snapshot = write_snapshot
+        self.registry.maybe_flush()
+        self.registry.maybe_flush()
+        release.set()
+        await self.registry._flush
+        self.registry.maybe_flush()
+        await self.registry._flush
+        self.assertEqual(len(writes), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+
+from app.utils.exception import ValidationError
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+class TestPagination(unittest.TestCase):
+    def test_round_trip(self):
+        cursor = encode_cursor({"id": 42})
+        self.assertEqual(decode_cursor(cursor), {"id": 42})
+
+    def test_tampered_cursor(self):
+        cursor = encode_cursor({"id": 42})
+        tampered = cursor[:-2] + ("AA" if cursor[-2:] != "AA" else "BB")
+        with self.assertRaises(ValidationError):
+            decode_cursor(tampered)
+
+    def test_malformed_cursor(self):
+        with self.assertRaises(ValidationError):
+            decode_cursor("not-a-cursor")
+
+
+if __name__ == "__main__":
+    unittest.main()
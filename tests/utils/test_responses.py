@@ -0,0 +1,36 @@
+import json
+import unittest
+from app.models.user import Users
+from app.schemas.user import UserListResponse, UserResponse
+from app.utils.responses import FastJSONResponse
+
+
+class TestFastJSONResponse(unittest.TestCase):
+    def setUp(self):
+        self.users = [
+            Users(
+                id=index,
+                email=f"user{index}@example.com",
+                first_name="Zoë",
+                last_name="User",
+                password="hash",
+            )
+            for index in (1, 2)
+        ]
+
+    def test_from_models_reads_attributes(self):
+        items = UserResponse.from_models(self.users)
+        self.assertEqual([item.id for item in items], [1, 2])
+        self.assertEqual(items[0], UserResponse.from_model(self.users[0]))
+        self.assertNotIn("password", items[0].model_dump())
+
+    def test_renders_models(self):
+        page = UserListResponse(items=UserResponse.from_models(self.users))
+        response = FastJSONResponse(page)
+        self.assertEqual(response.media_type, "application/json")
+        self.assertEqual(json.loads(response.body), page.model_dump(mode="json"))
+        self.assertIn("Zoë".encode(), response.body)
+
+
+if __name__ == "__main__":
+    unittest.main()
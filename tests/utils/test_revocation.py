@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app.utils.revocation import (
+    MemoryRevocationStore,
+    RevocationList,
+    SqliteRevocationStore,
+)
+
+
+class TestRevocationList(unittest.IsolatedAsyncioTestCase):
+    async def test_revoke(self):
+        revocation_list = RevocationList(MemoryRevocationStore())
+        self.assertFalse(revocation_list.is_revoked("jti:1"))
+        await revocation_list.revoke("jti:1", time.time() + 60)
+        self.assertTrue(revocation_list.is_revoked("jti:1"))
+        self.assertIsNotNone(revocation_list.revoked_at("jti:1"))
+
+    async def test_revoke_many_writes_once(self):
+        store = MemoryRevocationStore()
+        revocation_list = RevocationList(store)
+        with patch.object(store, "add_many", wraps=store.add_many) as add:
+            await revocation_list.revoke_many(["sub:1", "sub:2"], time.time() + 60)
+        add.assert_called_once()
+        self.assertTrue(revocation_list.is_revoked("sub:1"))
+        self.assertTrue(revocation_list.is_revoked("sub:2"))
+
+    async def test_expired_entries_are_compacted(self):
+        revocation_list = RevocationList(MemoryRevocationStore())
+        await revocation_list.revoke("jti:1", time.time() + 0.05)
+        await revocation_list.revoke("jti:2", time.time() + 60)
+        time.sleep(0.1)
+        self.assertFalse(revocation_list.is_revoked("jti:1"))
+        self.assertEqual(len(revocation_list), 1)
+
+    async def test_sqlite_store_is_shared_between_lists(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "revocations.db")
+            first = RevocationList(SqliteRevocationStore(path))
+            second = RevocationList(SqliteRevocationStore(path))
+            await first.revoke("jti:1", time.time() + 60)
+            await second.start()
+            self.addCleanup(second.stop)
+            self.assertTrue(second.is_revoked("jti:1"))
+            await first.revoke("jti:2", time.time() + 60)
+            self.assertFalse(second.is_revoked("jti:2"))
+            second.sync()
+            self.assertTrue(second.is_revoked("jti:2"))
+
+    async def test_lookup_does_not_touch_the_store(self):
+        store = MemoryRevocationStore()
+        revocation_list = RevocationList(store)
+        await revocation_list.start()
+        self.addCleanup(revocation_list.stop)
+        with patch.object(store, "load", side_effect=AssertionError):
+            self.assertFalse(revocation_list.is_revoked("jti:1"))
+
+    async def test_sync_runs_in_the_background(self):
+        store = MemoryRevocationStore()
+        revocation_list = RevocationList(store, sync_seconds=0.01)
+        self.addCleanup(revocation_list.stop)
+        self.assertFalse(revocation_list.is_revoked("jti:1"))
+        store.add("jti:1", time.time() + 60, time.time())
+        for _ in range(100):
+            if revocation_list.is_revoked("jti:1"):
+                break
+            await asyncio.sleep(0.01)
+        self.assertTrue(revocation_list.is_revoked("jti:1"))
+
+    async def test_failed_sync_keeps_the_index(self):
+        store = MemoryRevocationStore()
+        revocation_list = RevocationList(store)
+        await revocation_list.revoke("jti:1", time.time() + 60)
+        with patch.object(store, "load", side_effect=OSError("disk")):
+            with patch("app.utils.revocation.log_warning") as warning:
+                stopped = threading.Event()
+                stopped.set()
+                revocation_list._run(stopped)
+        warning.assert_called_once()
+        self.assertTrue(revocation_list.is_revoked("jti:1"))
+
+    async def test_memory_store_purge_keeps_cursor(self):
+        store = MemoryRevocationStore()
+        store.add("jti:1", time.time() - 1, time.time())
+        store.add("jti:2", time.time() + 60, time.time())
+        cursor, entries = store.load()
+        self.assertEqual(len(entries), 2)
+        store.purge(time.time())
+        store.add("jti:3", time.time() + 60, time.time())
+        _, entries = store.load(cursor)
+        self.assertEqual([entry[0] for entry in entries], ["jti:3"])
+
+
+if __name__ == "__main__":
+    unittest.main()